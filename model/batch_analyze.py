@@ -0,0 +1,152 @@
+"""
+Resumable batch analysis for model2.
+
+Reads usernames (one per line, blank lines and #comments skipped) from a
+file or stdin, fetches and analyzes them on a thread pool and appends one
+JSON line per user to the output file, in input order:
+
+    {"username": "...", "status": "ok", "result": {...AnalysisResult...}}
+    {"username": "...", "status": "error", "error": "..."}
+
+Every --checkpoint-every users the output is fsynced and
+<output>.checkpoint records how many usernames are done and the output
+size at that point. Rerunning the same command after an interruption
+truncates anything written after the last checkpoint and continues from
+there, so no finished user is fetched twice and no line is duplicated.
+
+    python batch_analyze.py usernames.txt -o results.jsonl --workers 32
+    cat usernames.txt | python batch_analyze.py - -o results.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Callable, Dict, Iterable, Iterator, Tuple
+
+from model2 import LeetCodeAnalyzer, get_analyzer
+from upstream_client import UpstreamClient
+
+
+def read_usernames(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        username = line.strip()
+        if username and not username.startswith('#'):
+            yield username
+
+
+def analyze_username(client: UpstreamClient, analyzer: LeetCodeAnalyzer, username: str) -> Dict:
+    """Fetch and analyze one user; failures become error records instead of exceptions"""
+    try:
+        data = client.fetch_user(username)
+        if data is None:
+            return {"username": username, "status": "error", "error": "Could not fetch user data"}
+        result = analyzer.analyze_user(data)
+        return {"username": username, "status": "ok", "result": asdict(result)}
+    except Exception as e:
+        return {"username": username, "status": "error", "error": str(e)}
+
+
+def ordered_map(pool: ThreadPoolExecutor, fn: Callable, items: Iterable, window: int) -> Iterator:
+    """pool.map that keeps at most window tasks in flight, so the input can be unbounded"""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class Checkpoint:
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Tuple[int, int]:
+        """(usernames done, output bytes) from the last checkpoint, or (0, 0)"""
+        if not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state["done"], state["output_bytes"]
+
+    def save(self, done: int, output_bytes: int) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"done": done, "output_bytes": output_bytes, "updated_at": time.time()}, f)
+        os.replace(tmp, self.path)
+
+
+def run(lines: Iterable[str], output: str, workers: int = 16, checkpoint_every: int = 200,
+        client: UpstreamClient = None, analyzer: LeetCodeAnalyzer = None) -> Tuple[int, int]:
+    """Analyze every username not yet done; returns (usernames done in total, errors in this run)"""
+    checkpoint = Checkpoint(output + ".checkpoint")
+    done, output_bytes = checkpoint.load()
+    if done == 0 and os.path.exists(output) and os.path.getsize(output) > 0:
+        raise FileExistsError(f"{output} exists without a checkpoint; remove it or choose another output")
+    if done:
+        print(f"🔍 Resuming after {done} users", file=sys.stderr)
+
+    client = client or UpstreamClient(concurrency=workers)
+    if client.concurrency < workers:
+        raise ValueError(f"client pool size {client.concurrency} is smaller than workers={workers}")
+    analyzer = analyzer or get_analyzer()
+    usernames = itertools.islice(read_usernames(lines), done, None)
+    errors = 0
+    started = time.perf_counter()
+    processed = 0
+
+    with open(output, 'a+b') as out:
+        # Drop lines written after the last checkpoint; they are redone below
+        out.truncate(output_bytes)
+        out.seek(output_bytes)
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            for record in ordered_map(pool, lambda name: analyze_username(client, analyzer, name),
+                                      usernames, window=2 * workers):
+                line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n"
+                out.write(line)
+                # Advance both together, so a checkpoint never counts bytes of an uncounted line
+                done, output_bytes = done + 1, output_bytes + len(line)
+                processed += 1
+                if record["status"] != "ok":
+                    errors += 1
+                if done % checkpoint_every == 0:
+                    out.flush()
+                    os.fsync(out.fileno())
+                    checkpoint.save(done, output_bytes)
+                    rate = processed / (time.perf_counter() - started)
+                    print(f"✅ {done} users done ({errors} errors this run), {rate:.1f} users/s", file=sys.stderr)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            out.flush()
+            os.fsync(out.fileno())
+            checkpoint.save(done, output_bytes)
+    return done, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze many LeetCode users with model2, resumably")
+    parser.add_argument("input", help="file with one username per line, or - for stdin")
+    parser.add_argument("-o", "--output", required=True, help="JSON Lines file results are appended to")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--checkpoint-every", type=int, default=200)
+    args = parser.parse_args()
+
+    try:
+        if args.input == "-":
+            done, errors = run(sys.stdin, args.output, args.workers, args.checkpoint_every)
+        else:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                done, errors = run(f, args.output, args.workers, args.checkpoint_every)
+    except KeyboardInterrupt:
+        raise SystemExit("❌ Interrupted; rerun the same command to resume")
+    print(f"✅ Finished: {done} users in {args.output} ({errors} errors this run)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
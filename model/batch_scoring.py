@@ -0,0 +1,163 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+# Scoring constants shared with LeetCodeAnalyzer's scalar path
+DEFAULT_TOPIC_DIFFICULTY = 3
+TOPIC_DIVERSITY_DIVISOR = 20
+ADVANCED_DIFFICULTY = 4
+WEAK_THRESHOLD = 0.4
+MAX_WEAK_AREAS = 5
+
+
+@dataclass
+class UserBatch:
+    """
+    Struct-of-arrays view of N processed users over T topic columns.
+
+    topic_order holds the position of each topic in the user's own
+    topic_scores dict (T for absent topics) so that ties are broken in the
+    same order as the scalar path's stable sort. The flat_* arrays list the
+    present (row, column) cells in that same per-user order.
+    """
+    usernames: List[str]
+    topics: List[str]
+    solve_ratio: np.ndarray
+    active_days: np.ndarray
+    topic_counts: np.ndarray
+    topic_present: np.ndarray
+    topic_order: np.ndarray
+    flat_rows: np.ndarray
+    flat_cols: np.ndarray
+    row_offsets: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.usernames)
+
+    @classmethod
+    def from_processed(cls, users: Sequence) -> "UserBatch":
+        """Build a batch from ProcessedUserData objects with one scatter per array"""
+        columns: Dict[str, int] = {}
+        flat_cols: List[int] = []
+        flat_counts: List[int] = []
+        flat_order: List[int] = []
+        row_lengths: List[int] = []
+        for user in users:
+            scores = user.topic_scores
+            flat_cols.extend([columns.setdefault(topic, len(columns)) for topic in scores])
+            flat_counts.extend(scores.values())
+            flat_order.extend(range(len(scores)))
+            row_lengths.append(len(scores))
+
+        n_users, n_topics = len(users), len(columns)
+        lengths = np.array(row_lengths, dtype=np.intp)
+        rows = np.repeat(np.arange(n_users, dtype=np.intp), lengths)
+        cols = np.array(flat_cols, dtype=np.intp)
+        topic_counts = np.zeros((n_users, n_topics), dtype=np.int64)
+        topic_present = np.zeros((n_users, n_topics), dtype=bool)
+        topic_order = np.full((n_users, n_topics), n_topics, dtype=np.int64)
+        topic_counts[rows, cols] = flat_counts
+        topic_present[rows, cols] = True
+        topic_order[rows, cols] = flat_order
+
+        row_offsets = np.zeros(n_users + 1, dtype=np.intp)
+        np.cumsum(lengths, out=row_offsets[1:])
+        return cls(
+            usernames=[user.username for user in users],
+            topics=list(columns),
+            solve_ratio=np.array([user.solve_ratio for user in users], dtype=np.float64),
+            active_days=np.array([user.active_days for user in users], dtype=np.int64),
+            topic_counts=topic_counts,
+            topic_present=topic_present,
+            topic_order=topic_order,
+            flat_rows=rows,
+            flat_cols=cols,
+            row_offsets=row_offsets,
+        )
+
+
+@dataclass
+class BatchScores:
+    """Array results of score_batch, convertible to the scalar path's Python types"""
+    batch: UserBatch
+    performance_scores: np.ndarray
+    proficiency: np.ndarray
+    weak_columns: np.ndarray
+
+    def topic_proficiency(self) -> List[Dict[str, float]]:
+        """Per-user proficiency dicts in each user's own topic order"""
+        batch = self.batch
+        values = self.proficiency[batch.flat_rows, batch.flat_cols].tolist()
+        names = np.array(batch.topics, dtype=object)[batch.flat_cols].tolist()
+        offsets = batch.row_offsets.tolist()
+        return [
+            dict(zip(names[start:end], values[start:end]))
+            for start, end in zip(offsets, offsets[1:])
+        ]
+
+    def weak_areas(self) -> List[List[str]]:
+        """Per-user weak area names, weakest first"""
+        topics = self.batch.topics
+        return [[topics[col] for col in row if col >= 0] for row in self.weak_columns.tolist()]
+
+
+def topic_difficulty_vector(topics: List[str], topic_difficulty: Dict[str, int]) -> np.ndarray:
+    """Difficulty level for each topic column"""
+    return np.array(
+        [topic_difficulty.get(topic, DEFAULT_TOPIC_DIFFICULTY) for topic in topics],
+        dtype=np.int64,
+    )
+
+
+def performance_scores(batch: UserBatch, difficulty: np.ndarray) -> np.ndarray:
+    """Vectorized LeetCodeAnalyzer.calculate_performance_score"""
+    n_topics = batch.topic_present.sum(axis=1)
+    n_advanced = (batch.topic_present & (difficulty >= ADVANCED_DIFFICULTY)).sum(axis=1)
+    has_topics = n_topics > 0
+    topic_diversity = np.where(has_topics, n_topics / TOPIC_DIVERSITY_DIVISOR, 0.0)
+    advanced_ratio = np.where(has_topics, n_advanced / np.maximum(n_topics, 1), 0.0)
+
+    solve_ratio_score = np.minimum(batch.solve_ratio * 100 * 0.5, 50)
+    activity_score = np.minimum(batch.active_days * 0.5, 20)
+    diversity_score = topic_diversity * 15
+    advanced_score = advanced_ratio * 15
+
+    total_score = solve_ratio_score + activity_score + diversity_score + advanced_score
+    return np.minimum(total_score, 100.0)
+
+
+def topic_proficiency_matrix(batch: UserBatch, difficulty: np.ndarray) -> np.ndarray:
+    """Vectorized LeetCodeAnalyzer.calculate_topic_proficiency over the N x T matrix"""
+    base_proficiency = np.minimum(batch.topic_counts / 30, 1.0)
+    difficulty_adjustment = 1.0 - (difficulty - 1) * 0.05
+    return np.clip(base_proficiency * difficulty_adjustment, 0.0, 1.0)
+
+
+def weak_area_columns(batch: UserBatch, proficiency: np.ndarray) -> np.ndarray:
+    """
+    Column indices of each user's weakest topics, weakest first, padded
+    with -1. Matches LeetCodeAnalyzer.identify_weak_areas.
+    """
+    weak = batch.topic_present & (proficiency < WEAK_THRESHOLD)
+    keyed = np.where(weak, proficiency, np.inf)
+    # Primary key is the score, ties fall back to the user's own topic order
+    ranked = np.lexsort((batch.topic_order, keyed), axis=1)[:, :MAX_WEAK_AREAS]
+    ranked_weak = np.take_along_axis(weak, ranked, axis=1)
+    return np.where(ranked_weak, ranked, -1)
+
+
+def score_batch(batch: UserBatch, topic_difficulty: Dict[str, int]) -> BatchScores:
+    """
+    Compute performance scores, topic proficiencies and weak areas for a
+    whole batch with array operations. Converted back to Python types the
+    results are identical to calling the scalar LeetCodeAnalyzer methods
+    user by user.
+    """
+    difficulty = topic_difficulty_vector(batch.topics, topic_difficulty)
+    proficiency = topic_proficiency_matrix(batch, difficulty)
+    return BatchScores(
+        batch=batch,
+        performance_scores=performance_scores(batch, difficulty),
+        proficiency=proficiency,
+        weak_columns=weak_area_columns(batch, proficiency),
+    )
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark for parsing raw upstream profiles.
+
+Compares the original multi-step cleaning path (clean_api_data,
+parse_total_questions, parse_submissions, parse_streak, parse_user_data)
+with the single-pass LeetCodeAnalyzer.parse_raw_profile and checks that
+both produce the same ProcessedUserData.
+
+    python bench_parse.py --profiles 5000 --repeat 5
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from fetch import (
+    LeetCodeAnalyzer,
+    LeetCodeUserData,
+    clean_api_data,
+    parse_streak,
+    parse_submissions,
+    parse_total_questions,
+)
+
+
+def make_profiles(count: int, seed: int = 42) -> List[Dict]:
+    """Synthetic profiles shaped like the 3003 upstream's data payload"""
+    rng = random.Random(seed)
+    analyzer = LeetCodeAnalyzer()
+    topics = list(analyzer.topic_difficulty) + ['Simulation', 'Counting']
+    profiles = []
+    for i in range(count):
+        solved = rng.randint(0, 3000)
+        skills = [f"{topic} x{rng.randint(1, 120)}" for topic in rng.sample(topics, rng.randint(0, 25))]
+        profiles.append({
+            "username": f"user_{i}",
+            "rank": f"{rng.randint(1, 5_000_000):,}",
+            "totalQuestions": f"{solved}\n/3456\nSolved",
+            "languages": rng.sample(['Python3', 'C++', 'Java', 'JavaScript', 'Go'], rng.randint(1, 4)),
+            "skills": skills,
+            "submissions": f"{rng.randint(0, 9000):,} submissions in the past one year",
+            "streak": f"Total active days:\n{rng.randint(0, 365)}",
+        })
+    return profiles
+
+
+def parse_legacy(analyzer: LeetCodeAnalyzer, raw_user_data: Dict):
+    """The original cleaning chain followed by parse_user_data"""
+    user_data = LeetCodeUserData(
+        username=raw_user_data.get("username", ""),
+        rank=clean_api_data(raw_user_data.get("rank", "")),
+        totalQuestions=parse_total_questions(raw_user_data.get("totalQuestions", "")),
+        languages=raw_user_data.get("languages", []),
+        skills=raw_user_data.get("skills", []),
+        submissions=parse_submissions(raw_user_data.get("submissions", "")),
+        streak=parse_streak(raw_user_data.get("streak", ""))
+    )
+    return analyzer.parse_user_data(user_data)
+
+
+def time_per_profile(parse, profiles: List[Dict], repeat: int) -> float:
+    """Best-of-repeat cost of parsing one profile, in microseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for profile in profiles:
+            parse(profile)
+        best = min(best, time.perf_counter() - start)
+    return best / len(profiles) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark upstream profile parsing")
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    analyzer = LeetCodeAnalyzer()
+    profiles = make_profiles(args.profiles)
+
+    mismatches = sum(
+        1 for profile in profiles
+        if parse_legacy(analyzer, profile) != analyzer.parse_raw_profile(profile)
+    )
+    if mismatches:
+        raise SystemExit(f"❌ {mismatches} profiles parsed differently")
+
+    legacy = time_per_profile(lambda p: parse_legacy(analyzer, p), profiles, args.repeat)
+    single_pass = time_per_profile(analyzer.parse_raw_profile, profiles, args.repeat)
+    print(f"Profiles: {len(profiles)} (best of {args.repeat})")
+    print(f"Legacy cleaning chain : {legacy:8.2f} µs/profile")
+    print(f"Single-pass parser    : {single_pass:8.2f} µs/profile")
+    print(f"Speedup               : {legacy / single_pass:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
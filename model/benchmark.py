@@ -0,0 +1,249 @@
+"""
+Offline benchmark for the analyzer service.
+
+Measures either
+
+  * live:     HTTP requests against the FastAPI app, started in-process
+              against a local stub of the 3003 `/leetcode/{username}`
+              upstream with configurable latency and payload shapes, or
+  * pipeline: the bare LeetCodeAnalyzer parse + analyze path, no HTTP,
+
+and reports requests per second, p50/p95/p99 latency and peak RSS.
+An in-process service shares the interpreter with the load generator, so
+compare runs against each other; use --target for absolute numbers.
+--target drives an already running service as is: no stub is started, the
+service uses whatever upstream it was configured with (so the upstream and
+shape options have no effect), and peak RSS is not reported because only
+the load generator's own process could be measured.
+
+    python benchmark.py live --requests 2000 --concurrency 50 --upstream-latency-ms 20
+    python benchmark.py pipeline --requests 20000 --shape large
+    python benchmark.py live --target http://localhost:3002 --json results.json
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import resource
+import socket
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI
+
+TOPICS = [
+    'Array', 'String', 'Hash Table', 'Math', 'Two Pointers', 'Binary Search', 'Sorting',
+    'Greedy', 'Dynamic Programming', 'Backtracking', 'Stack', 'Queue', 'Linked List', 'Tree',
+    'Depth-First Search', 'Breadth-First Search', 'Binary Tree', 'Heap', 'Graph', 'Trie',
+    'Divide and Conquer', 'Union Find', 'Sliding Window', 'Bit Manipulation', 'Design',
+    'Simulation', 'Counting', 'Matrix', 'Prefix Sum', 'Monotonic Stack',
+]
+
+# Number of skills per payload shape
+PAYLOAD_SHAPES = {"small": (0, 4), "typical": (5, 15), "large": (20, 30)}
+
+
+def synthetic_profile(username: str, shape: str = "typical") -> Dict:
+    """Deterministic upstream payload for a username, so repeated users hash the same"""
+    seed = int.from_bytes(hashlib.blake2b(username.encode('utf-8'), digest_size=8).digest(), 'big')
+    rng = random.Random(seed)
+    low, high = PAYLOAD_SHAPES[shape]
+    skills = [f"{topic} x{rng.randint(1, 150)}" for topic in rng.sample(TOPICS, rng.randint(low, high))]
+    return {
+        "username": username,
+        "rank": f"{rng.randint(1, 5_000_000):,}",
+        "totalQuestions": f"{rng.randint(0, 3000)}\n/3456\nSolved",
+        "languages": rng.sample(['Python3', 'C++', 'Java', 'JavaScript', 'Go'], rng.randint(1, 4)),
+        "skills": skills,
+        "submissions": f"{rng.randint(0, 9000):,} submissions in the past one year",
+        "streak": f"Total active days:\n{rng.randint(0, 365)}",
+    }
+
+
+def create_stub_upstream(latency_ms: float, jitter_ms: float, shape: str, error_rate: float) -> FastAPI:
+    """Stand-in for the 3003 scraper with controllable latency and failures"""
+    stub = FastAPI()
+
+    @stub.get("/leetcode/{username}")
+    async def leetcode_user(username: str):
+        delay = latency_ms + random.uniform(0, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if random.random() < error_rate:
+            return {"success": False, "message": "Stub upstream error"}
+        return {"success": True, "data": synthetic_profile(username, shape)}
+
+    return stub
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_thread(app, port: int) -> uvicorn.Server:
+    """Run an ASGI app with uvicorn on a background thread until it is accepting requests"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Server on port {port} failed to start")
+        time.sleep(0.01)
+    return server
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct * len(sorted_values) / 100) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(mode: str, latencies: List[float], errors: int, elapsed: float,
+              measure_rss: bool = True) -> Dict:
+    """peak_rss_mb is this process's peak, or None when the service runs elsewhere"""
+    latencies = sorted(latencies)
+    total = len(latencies) + errors
+    return {
+        "mode": mode,
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1) if measure_rss else None,
+    }
+
+
+def usernames_for(args) -> List[str]:
+    """Request sequence drawing from a pool of --unique-users synthetic users"""
+    rng = random.Random(args.seed)
+    return [f"bench_user_{rng.randrange(args.unique_users)}" for _ in range(args.requests)]
+
+
+async def drive_http(target: str, usernames: List[str], concurrency: int, measure_rss: bool = True) -> Dict:
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(usernames)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=target, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            for username in queue:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(f"/analyze/{username}")
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return summarize("live", latencies, errors, elapsed, measure_rss)
+
+
+def run_live(args) -> Dict:
+    target = args.target
+    if target is None:
+        stub_port = free_port()
+        serve_in_thread(
+            create_stub_upstream(args.upstream_latency_ms, args.upstream_jitter_ms, args.shape, args.error_rate),
+            stub_port,
+        )
+        # The service reads its upstream URL at import time
+        os.environ["LEETCODE_API_URL"] = f"http://127.0.0.1:{stub_port}/leetcode/{{username}}"
+        import fetch
+
+        service_port = free_port()
+        serve_in_thread(fetch.app, service_port)
+        target = f"http://127.0.0.1:{service_port}"
+    # An external --target's memory is not visible from here
+    return asyncio.run(drive_http(target, usernames_for(args), args.concurrency, measure_rss=args.target is None))
+
+
+def run_pipeline(args) -> Dict:
+    from fetch import LeetCodeAnalyzer
+
+    analyzer = LeetCodeAnalyzer()
+    profiles = [synthetic_profile(username, args.shape) for username in usernames_for(args)]
+    latencies: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    for profile in profiles:
+        t0 = time.perf_counter()
+        try:
+            analyzer.analyze_processed(analyzer.parse_raw_profile(profile))
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - t0)
+    return summarize("pipeline", latencies, errors, time.perf_counter() - start)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the LeetCode analyzer service offline")
+    parser.add_argument("mode", choices=["live", "pipeline"])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--unique-users", type=int, default=1000,
+                        help="size of the synthetic user pool; lower means more cache hits")
+    parser.add_argument("--shape", choices=sorted(PAYLOAD_SHAPES), default="typical")
+    parser.add_argument("--upstream-latency-ms", type=float, default=10.0)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--target", default=None,
+                        help="benchmark an already running service, against its own upstream, "
+                             "instead of starting one with the stub")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    # Keep per-request logging out of the measurements
+    import logging
+    logging.disable(logging.INFO)
+    sys.stdout, real_stdout = open(os.devnull, 'w', encoding='utf-8'), sys.stdout
+    try:
+        result = run_live(args) if args.mode == "live" else run_pipeline(args)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    result["config"] = {
+        key: value for key, value in vars(args).items() if key not in ("mode", "json_path")
+    }
+    for key in ("requests", "errors", "elapsed_s", "rps", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb"):
+        value = result[key]
+        print(f"{key:>12}: {'n/a (external --target)' if value is None else value}")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    main()
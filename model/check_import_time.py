@@ -0,0 +1,75 @@
+"""
+Import-time budget check for model2.
+
+Measures, in fresh interpreters, how long `import model2` plus one
+heuristic analysis takes and which heavy modules got loaded on the way.
+Exits non-zero when the best of --runs exceeds --budget-ms or when numpy,
+pandas, sklearn or requests were imported, so it can gate CI.
+
+    python check_import_time.py
+    python check_import_time.py --budget-ms 80 --runs 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ("numpy", "pandas", "sklearn", "requests")
+
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+import model2
+imported = time.perf_counter()
+user = model2.LeetCodeUserData(
+    username="probe", rank="123,456", totalQuestions="250/3456", languages=["Python3"],
+    skills=["Array x40", "Dynamic Programming x5"], submissions="900", streak="Total active days:42",
+)
+model2.get_analyzer().analyze_user(user)
+analyzed = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "total_ms": (analyzed - start) * 1000,
+    "heavy": sorted(name for name in HEAVY if name in sys.modules),
+}))
+"""
+
+
+def probe(env) -> dict:
+    code = f"HEAVY = {HEAVY_MODULES!r}\n{PROBE}"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check model2's cold-start import budget")
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="limit for import plus one heuristic analysis")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as empty:
+        # Point artifacts at an empty directory so the heuristic path is measured
+        env = dict(os.environ, MODEL2_ARTIFACT_DIR=empty)
+        results = [probe(env) for _ in range(args.runs)]
+
+    best = min(results, key=lambda result: result["total_ms"])
+    heavy = sorted({name for result in results for name in result["heavy"]})
+    print(f"import model2      : {best['import_ms']:7.1f} ms")
+    print(f"+ one analysis     : {best['total_ms']:7.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"heavy modules      : {', '.join(heavy) or 'none'}")
+
+    if heavy:
+        raise SystemExit(f"❌ Heavy modules imported eagerly: {', '.join(heavy)}")
+    if best["total_ms"] > args.budget_ms:
+        raise SystemExit(f"❌ Cold start {best['total_ms']:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    print("✅ Within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Crash-safe crawl state for LeetCodeUserCollector, kept in SQLite.
+
+Records which ranking pages were fetched and the users they yielded, every
+completed profile, and failed profile fetches with their attempt counts.
+Each page and profile is committed in its own transaction, so a crawl that
+dies mid-way loses at most the request in flight; passing the same state
+to the next run continues from the next page and only fetches profiles
+that are neither done nor out of attempts. Completed profiles are never
+loaded back during a crawl, and collected users and profiles are read
+back a chunk at a time.
+
+    python model.py --state crawl.db
+    python crawl_state.py info crawl.db
+"""
+import argparse
+import json
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, List
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    method TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    user_count INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (method, page)
+);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    username TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS failures (
+    username TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Stay well below SQLite's bound-parameter limit
+QUERY_CHUNK = 500
+
+
+class CrawlState:
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "CrawlState":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def next_page(self, method: str) -> int:
+        (last,) = self.conn.execute("SELECT MAX(page) FROM pages WHERE method = ?", (method,)).fetchone()
+        return (last or 0) + 1
+
+    def iter_collected_users(self, method: str) -> Iterator[Dict]:
+        """Users kept from fetched ranking pages, in the order they were collected, a chunk at a time"""
+        last = 0
+        while True:
+            rows = self.conn.execute(
+                "SELECT rowid, data FROM users WHERE method = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                (method, last, QUERY_CHUNK),
+            ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield from (json.loads(data) for _, data in rows)
+
+    def record_page(self, method: str, page: int, users: List[Dict]) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)", (method, page, len(users), time.time())
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO users VALUES (?, ?, ?, ?)",
+                ((user['username'], method, page, json.dumps(user, ensure_ascii=False)) for user in users),
+            )
+
+    def _select(self, sql: str, usernames: List[str]) -> Iterable[tuple]:
+        for start in range(0, len(usernames), QUERY_CHUNK):
+            chunk = usernames[start:start + QUERY_CHUNK]
+            yield from self.conn.execute(sql.format(", ".join("?" * len(chunk))), chunk)
+
+    def unfinished(self, usernames: Iterable[str]) -> Iterator[str]:
+        """Usernames, deduplicated and in order, whose profile is neither done nor out of attempts"""
+        usernames = list(dict.fromkeys(usernames))
+        for start in range(0, len(usernames), QUERY_CHUNK):
+            chunk = usernames[start:start + QUERY_CHUNK]
+            finished = {username for (username,) in self._select(
+                "SELECT username FROM profiles WHERE username IN ({})", chunk
+            )}
+            finished.update(username for (username,) in self._select(
+                f"SELECT username FROM failures WHERE attempts >= {int(self.max_attempts)} AND username IN ({{}})",
+                chunk,
+            ))
+            yield from (username for username in chunk if username not in finished)
+
+    def iter_profiles(self, usernames: Iterable[str]) -> Iterator[Dict]:
+        """Completed profiles among usernames, in their order, one chunk in memory at a time"""
+        usernames = list(dict.fromkeys(usernames))
+        for start in range(0, len(usernames), QUERY_CHUNK):
+            chunk = usernames[start:start + QUERY_CHUNK]
+            found = dict(self._select("SELECT username, data FROM profiles WHERE username IN ({})", chunk))
+            yield from (json.loads(found[username]) for username in chunk if username in found)
+
+    def record_profile(self, username: str, profile: Dict) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?)",
+                (username, json.dumps(profile, ensure_ascii=False), time.time()),
+            )
+            self.conn.execute("DELETE FROM failures WHERE username = ?", (username,))
+
+    def record_failure(self, username: str, error: str = "not fetched") -> None:
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO failures VALUES (?, 1, ?, ?)
+                ON CONFLICT(username) DO UPDATE SET
+                    attempts = attempts + 1, last_error = excluded.last_error, updated_at = excluded.updated_at
+                """,
+                (username, error, time.time()),
+            )
+
+    def summary(self) -> Dict[str, int]:
+        def count(sql: str) -> int:
+            return self.conn.execute(sql).fetchone()[0]
+
+        return {
+            "pages": count("SELECT COUNT(*) FROM pages"),
+            "users": count("SELECT COUNT(*) FROM users"),
+            "profiles": count("SELECT COUNT(*) FROM profiles"),
+            "pending": count(
+                "SELECT COUNT(*) FROM users WHERE username NOT IN (SELECT username FROM profiles)"
+                f" AND username NOT IN (SELECT username FROM failures WHERE attempts >= {int(self.max_attempts)})"
+            ),
+            "failed": count(f"SELECT COUNT(*) FROM failures WHERE attempts >= {int(self.max_attempts)}"),
+            "retrying": count(f"SELECT COUNT(*) FROM failures WHERE attempts < {int(self.max_attempts)}"),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a LeetCodeUserCollector crawl state")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    info = subcommands.add_parser("info", help="show crawl progress")
+    info.add_argument("path")
+    info.add_argument("--max-attempts", type=int, default=3)
+    args = parser.parse_args()
+
+    with CrawlState(args.path, args.max_attempts) as state:
+        for key, value in state.summary().items():
+            print(f"{key:10}: {value}")
+
+
+if __name__ == "__main__":
+    main()
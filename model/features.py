@@ -0,0 +1,92 @@
+"""
+Fixed-schema feature matrix for ProcessedUserData.
+
+Every user becomes one float32 row: the scalar profile features, then one
+column per known topic (solved count) in the order of the analyzer's
+topic_difficulty table, then a single column summing all unknown topics.
+The column layout only changes when that table does, and feature_names
+records it in the artifact metadata so incompatible models are rejected.
+
+numpy is imported on the first transform, so building the schema (and
+heuristic-only use of model2) does not pay for it.
+"""
+from operator import attrgetter
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Bump when the column layout changes for reasons other than the topic table
+FEATURE_SCHEMA_VERSION = 2
+
+PROFILE_FEATURES = (
+    "solve_ratio",
+    "total_solved",
+    "languages_count",
+    "submissions_count",
+    "active_days",
+    "topic_diversity",
+    "advanced_topics_ratio",
+)
+UNKNOWN_TOPIC = "<unknown>"
+
+
+class FeatureBuilder:
+    def __init__(self, topics: Iterable[str]):
+        self.topics: List[str] = list(topics)
+        offset = len(PROFILE_FEATURES) + 2
+        self.topic_columns = {topic: offset + i for i, topic in enumerate(self.topics)}
+        self.unknown_column = offset + len(self.topics)
+        self.feature_names: List[str] = (
+            list(PROFILE_FEATURES)
+            + ["topic_count", "topic_solved_total"]
+            + [f"topic:{topic}" for topic in self.topics]
+            + [f"topic:{UNKNOWN_TOPIC}"]
+        )
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_names)
+
+    def transform(self, users: Sequence, out: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """
+        Feature matrix for any number of users. Profile columns are filled
+        column-wise and topic counts scattered in one pass over flat index
+        buffers, so no per-row lists are built. Pass out to reuse a buffer.
+        """
+        import numpy as np
+
+        n = len(users)
+        if out is None:
+            X = np.zeros((n, self.n_features), dtype=np.float32)
+        else:
+            if out.shape != (n, self.n_features) or out.dtype != np.float32:
+                raise ValueError(f"out must be a float32 array of shape {(n, self.n_features)}")
+            X = out
+            X.fill(0)
+
+        for j, name in enumerate(PROFILE_FEATURES):
+            X[:, j] = np.fromiter(map(attrgetter(name), users), dtype=np.float32, count=n)
+
+        rows: List[int] = []
+        columns: List[int] = []
+        counts: List[int] = []
+        topic_columns = self.topic_columns
+        unknown = self.unknown_column
+        for i, user in enumerate(users):
+            for topic, count in user.topic_scores.items():
+                rows.append(i)
+                columns.append(topic_columns.get(topic, unknown))
+                counts.append(count)
+        # Unknown topics share a column, so repeated indices must accumulate
+        np.add.at(X, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)),
+                  np.array(counts, dtype=np.float32))
+
+        topic_start = len(PROFILE_FEATURES) + 2
+        X[:, topic_start - 2] = np.fromiter((len(user.topic_scores) for user in users), dtype=np.float32, count=n)
+        X[:, topic_start - 1] = X[:, topic_start:].sum(axis=1)
+        return X
+
+    def transform_one(self, user) -> "np.ndarray":
+        """Single-row matrix for one user"""
+        return self.transform([user])
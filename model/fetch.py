@@ -1,13 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from pydantic import BaseModel
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+import argparse
+import multiprocessing
 import uvicorn
 import httpx
+import asyncio
 import json
+import os
 import re
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 import logging
 
+import metrics
+from batch_scoring import UserBatch, score_batch
+from problem_catalog import LEVEL_DIFFICULTY, get_catalog, solved_problem_names
+from result_cache import ResultCache, SharedResultStore, payload_digest
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -46,6 +58,39 @@ class ProcessedUserData:
     active_days: int
     topic_diversity: float
     advanced_topics_ratio: float
+    rank: str = ""
+    solved_problems: List[str] = field(default_factory=list)
+
+# Precompiled patterns for parsing upstream fields
+SKILL_PATTERN = re.compile(r'(.+?)x(\d+)')
+SKILL_LINES_PATTERN = re.compile(r'^(.+?)x(\d+)', re.MULTILINE)
+ACTIVE_DAYS_PATTERN = re.compile(r'active days:(\d+)')
+TOTAL_QUESTIONS_PATTERN = re.compile(r'(\d+)\s*/\s*(\d+)')
+SOLVED_PAIR_PATTERN = re.compile(r'(\d+/\d+)')
+SUBMISSIONS_PATTERN = re.compile(r'[\d,]+')
+NUMBER_PATTERN = re.compile(r'\d+')
+NOISE_PATTERN = re.compile(r'Solved|Views|Total active days:')
+
+# Per-stage latency: upstream_fetch, parse, scoring, recommendations, serialization
+STAGE_LATENCY = metrics.histogram(
+    "analyzer_stage_duration_seconds", "Time spent in each analysis stage", ["stage"]
+)
+
+# Set inside pool workers, whose own registry is never scraped; the timings
+# are shipped back with the result and observed by the parent instead
+_stage_timings: Optional[List] = None
+
+@contextmanager
+def stage_timer(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if _stage_timings is not None:
+            _stage_timings.append((stage, elapsed))
+        else:
+            STAGE_LATENCY.labels(stage=stage).observe(elapsed)
 
 class LeetCodeAnalyzer:
     def __init__(self):
@@ -60,45 +105,11 @@ class LeetCodeAnalyzer:
             'Bit Manipulation': 3, 'Design': 4, 'Geometry': 4,
             'Interactive': 4, 'Segment Tree': 5, 'Binary Indexed Tree': 5
         }
+        # Unknown topics default to difficulty 3, so only listed ones can be advanced
+        self.advanced_topics = frozenset(
+            topic for topic, difficulty in self.topic_difficulty.items() if difficulty >= 4
+        )
         
-        self.problem_database = self._initialize_problem_database()
-        
-    def _initialize_problem_database(self):
-        """Initialize problem database with recommendations"""
-        return {
-            'Array': [
-                {'title': 'Two Sum', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/two-sum/'},
-                {'title': 'Best Time to Buy and Sell Stock', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/best-time-to-buy-and-sell-stock/'},
-                {'title': 'Maximum Subarray', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/maximum-subarray/'},
-                {'title': 'Contains Duplicate', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/contains-duplicate/'},
-                {'title': 'Product of Array Except Self', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/product-of-array-except-self/'},
-                {'title': 'Merge Intervals', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/merge-intervals/'},
-                {'title': 'Median of Two Sorted Arrays', 'difficulty': 'Hard', 'url': 'https://leetcode.com/problems/median-of-two-sorted-arrays/'}
-            ],
-            'Dynamic Programming': [
-                {'title': 'Climbing Stairs', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/climbing-stairs/'},
-                {'title': 'House Robber', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/house-robber/'},
-                {'title': 'Longest Increasing Subsequence', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/longest-increasing-subsequence/'},
-                {'title': 'Coin Change', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/coin-change/'},
-                {'title': 'Word Break', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/word-break/'},
-                {'title': 'Edit Distance', 'difficulty': 'Hard', 'url': 'https://leetcode.com/problems/edit-distance/'}
-            ],
-            'Hash Table': [
-                {'title': 'Valid Anagram', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/valid-anagram/'},
-                {'title': 'Group Anagrams', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/group-anagrams/'},
-                {'title': 'Top K Frequent Elements', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/top-k-frequent-elements/'},
-                {'title': 'Two Sum', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/two-sum/'},
-                {'title': 'Longest Consecutive Sequence', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/longest-consecutive-sequence/'}
-            ],
-            'String': [
-                {'title': 'Valid Anagram', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/valid-anagram/'},
-                {'title': 'Longest Substring Without Repeating Characters', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/longest-substring-without-repeating-characters/'},
-                {'title': 'Valid Palindrome', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/valid-palindrome/'},
-                {'title': 'Implement strStr()', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/implement-strstr/'},
-                {'title': 'Longest Palindromic Substring', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/longest-palindromic-substring/'}
-            ]
-        }
-
     def parse_user_data(self, data: LeetCodeUserData) -> ProcessedUserData:
         """Parse and process raw user data"""
         try:
@@ -107,21 +118,9 @@ class LeetCodeAnalyzer:
             
             # Parse total questions
             solved, total = map(int, data.totalQuestions.split('/'))
-            solve_ratio = solved / total if total > 0 else 0
             
             # Parse skills
-            topic_scores = {}
-            for skill in data.skills:
-                match = re.match(r'(.+?)x(\d+)', skill)
-                if match:
-                    topic, count = match.groups()
-                    topic_scores[topic.strip()] = int(count)
-            
-            # Calculate metrics
-            topic_diversity = len(topic_scores) / 20 if topic_scores else 0
-            advanced_topics = sum(1 for topic in topic_scores.keys() 
-                                if self.topic_difficulty.get(topic, 3) >= 4)
-            advanced_topics_ratio = advanced_topics / len(topic_scores) if topic_scores else 0
+            topic_scores = self._parse_skills(data.skills)
             
             # Parse submissions
             submissions_count = int(data.submissions) if data.submissions.isdigit() else 0
@@ -129,25 +128,104 @@ class LeetCodeAnalyzer:
             # Parse active days
             active_days = 0
             if 'active days:' in data.streak:
-                active_days = int(re.search(r'active days:(\d+)', data.streak).group(1))
+                active_days = int(ACTIVE_DAYS_PATTERN.search(data.streak).group(1))
             
-            return ProcessedUserData(
-                username=data.username,
-                rank_numeric=rank_numeric,
-                total_solved=solved,
-                total_questions=total,
-                solve_ratio=solve_ratio,
-                languages_count=len(data.languages),
-                topic_scores=topic_scores,
-                submissions_count=submissions_count,
-                active_days=active_days,
-                topic_diversity=topic_diversity,
-                advanced_topics_ratio=advanced_topics_ratio
+            return self._build_processed_data(
+                data.username, data.rank, rank_numeric, solved, total,
+                len(data.languages), topic_scores, submissions_count, active_days
             )
         except Exception as e:
             logger.error(f"Error parsing user data: {e}")
             raise ValueError(f"Invalid user data format: {e}")
 
+    def parse_raw_profile(self, raw_user_data: Dict) -> ProcessedUserData:
+        """
+        Parse a raw upstream profile straight into ProcessedUserData in one
+        pass. Equivalent to clean_api_data / parse_total_questions /
+        parse_submissions / parse_streak followed by parse_user_data, but
+        each field is scanned once with precompiled patterns.
+        """
+        try:
+            rank = raw_user_data.get("rank", "")
+            if rank:
+                rank = NOISE_PATTERN.sub('', rank.replace('\n', ' ')).strip()
+            rank_numeric = int(rank.replace(',', '')) if rank and rank != 'N/A' else 1000000
+            
+            total_questions = raw_user_data.get("totalQuestions", "")
+            match = TOTAL_QUESTIONS_PATTERN.search(total_questions) if total_questions else None
+            if match:
+                solved, total = int(match.group(1)), int(match.group(2))
+            else:
+                # Unusual layouts go through the original cleaning rules
+                solved, total = map(int, parse_total_questions(total_questions).split('/'))
+            
+            submissions = raw_user_data.get("submissions", "")
+            match = SUBMISSIONS_PATTERN.search(submissions) if submissions else None
+            digits = match.group(0).replace(',', '') if match else ""
+            submissions_count = int(digits) if digits.isdigit() else 0
+            
+            streak = raw_user_data.get("streak", "")
+            match = NUMBER_PATTERN.search(streak) if streak else None
+            active_days = int(match.group(0)) if match else 0
+            
+            return self._build_processed_data(
+                raw_user_data.get("username", ""), rank, rank_numeric, solved, total,
+                len(raw_user_data.get("languages", [])),
+                self._parse_skill_lines(raw_user_data.get("skills", [])),
+                submissions_count, active_days,
+                solved_problems=solved_problem_names(raw_user_data)
+            )
+        except Exception as e:
+            logger.error(f"Error parsing user data: {e}")
+            raise ValueError(f"Invalid user data format: {e}")
+
+    def _parse_skills(self, skills: List[str]) -> Dict[str, int]:
+        """Map skill strings like 'Array x12' to topic counts"""
+        topic_scores = {}
+        for skill in skills:
+            match = SKILL_PATTERN.match(skill)
+            if match:
+                topic, count = match.groups()
+                topic_scores[topic.strip()] = int(count)
+        return topic_scores
+
+    def _parse_skill_lines(self, skills: List[str]) -> Dict[str, int]:
+        """
+        Same result as _parse_skills, but scans all skills with one regex
+        pass over the newline-joined list
+        """
+        text = '\n'.join(skills)
+        if text.count('\n') != max(len(skills) - 1, 0):
+            # A skill spans several lines, so lines no longer map to skills
+            return self._parse_skills(skills)
+        return {topic.strip(): int(count) for topic, count in SKILL_LINES_PATTERN.findall(text)}
+
+    def _build_processed_data(self, username: str, rank: str, rank_numeric: int,
+                              solved: int, total: int, languages_count: int,
+                              topic_scores: Dict[str, int], submissions_count: int,
+                              active_days: int, solved_problems: Optional[List[str]] = None) -> ProcessedUserData:
+        """Derive the topic metrics and assemble ProcessedUserData"""
+        solve_ratio = solved / total if total > 0 else 0
+        topic_diversity = len(topic_scores) / 20 if topic_scores else 0
+        advanced_topics = len(self.advanced_topics.intersection(topic_scores))
+        advanced_topics_ratio = advanced_topics / len(topic_scores) if topic_scores else 0
+        
+        return ProcessedUserData(
+            username=username,
+            rank_numeric=rank_numeric,
+            total_solved=solved,
+            total_questions=total,
+            solve_ratio=solve_ratio,
+            languages_count=languages_count,
+            topic_scores=topic_scores,
+            submissions_count=submissions_count,
+            active_days=active_days,
+            topic_diversity=topic_diversity,
+            advanced_topics_ratio=advanced_topics_ratio,
+            rank=rank,
+            solved_problems=solved_problems or []
+        )
+
     def calculate_performance_score(self, processed_data: ProcessedUserData) -> float:
         """Calculate overall performance score (0-100)"""
         solve_ratio_score = min(processed_data.solve_ratio * 100 * 0.5, 50)
@@ -209,35 +287,28 @@ class LeetCodeAnalyzer:
         
         return recommendations
 
-    def suggest_problems(self, weak_areas: List[str]) -> List[Dict[str, str]]:
-        """Suggest specific problems based on weak areas"""
-        suggested = []
-        
-        for area in weak_areas[:3]:
-            if area in self.problem_database:
-                problems = self.problem_database[area][:3]
-                suggested.extend(problems)
-        
-        if len(suggested) < 5:
-            general_problems = [
-                {'title': 'Two Sum', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/two-sum/'},
-                {'title': 'Valid Parentheses', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/valid-parentheses/'},
-                {'title': 'Merge Two Sorted Lists', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/merge-two-sorted-lists/'}
-            ]
-            suggested.extend(general_problems)
-        
-        return suggested[:8]
+    def suggest_problems(self, weak_areas: List[str], solved: Optional[List[str]] = None,
+                         level: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Suggest ranked, deduplicated catalog problems for the weakest areas,
+        skipping solved ones and preferring the difficulty that suits the level
+        """
+        return get_catalog().suggest(weak_areas[:3], per_topic=3, min_count=5, limit=8, solved=solved or (),
+                                     difficulty=LEVEL_DIFFICULTY.get(level))
 
-    def create_improvement_roadmap(self, processed_data: ProcessedUserData, weak_areas: List[str]) -> List[str]:
-        """Create a structured improvement roadmap"""
-        roadmap = []
-        
+    def performance_level(self, processed_data: ProcessedUserData) -> str:
+        """Beginner, Intermediate or Advanced"""
         if processed_data.solve_ratio < 0.02:
-            level = "Beginner"
+            return "Beginner"
         elif processed_data.solve_ratio < 0.08:
-            level = "Intermediate"
-        else:
-            level = "Advanced"
+            return "Intermediate"
+        return "Advanced"
+
+    def create_improvement_roadmap(self, processed_data: ProcessedUserData, weak_areas: List[str],
+                                   level: Optional[str] = None) -> List[str]:
+        """Create a structured improvement roadmap"""
+        roadmap = []
+        level = level or self.performance_level(processed_data)
         
         if level == "Beginner":
             roadmap.append("🎯 Phase 1 (Weeks 1-2): Master basic Array and String problems")
@@ -263,26 +334,56 @@ class LeetCodeAnalyzer:
         """Main analysis function"""
         try:
             processed_data = self.parse_user_data(data)
+            return self.analyze_processed(processed_data)
+        
+        except Exception as e:
+            logger.error(f"Error analyzing user {data.username}: {e}")
+            raise Exception(f"Analysis failed: {e}")
+
+    def analyze_processed(self, processed_data: ProcessedUserData) -> AnalysisResult:
+        """Score and build recommendations for already parsed user data"""
+        with stage_timer("scoring"):
             performance_score = self.calculate_performance_score(processed_data)
             topic_proficiency = self.calculate_topic_proficiency(processed_data)
             weak_areas = self.identify_weak_areas(topic_proficiency)
+        with stage_timer("recommendations"):
             recommendations = self.generate_recommendations(processed_data, weak_areas)
-            suggested_problems = self.suggest_problems(weak_areas)
-            improvement_roadmap = self.create_improvement_roadmap(processed_data, weak_areas)
-            
-            return AnalysisResult(
-                username=data.username,
-                performance_score=performance_score,
-                topic_proficiency=topic_proficiency,
-                weak_areas=weak_areas,
-                recommendations=recommendations,
-                suggested_problems=suggested_problems,
-                improvement_roadmap=improvement_roadmap
-            )
+            level = self.performance_level(processed_data)
+            suggested_problems = self.suggest_problems(weak_areas, processed_data.solved_problems, level)
+            improvement_roadmap = self.create_improvement_roadmap(processed_data, weak_areas, level)
         
-        except Exception as e:
-            logger.error(f"Error analyzing user {data.username}: {e}")
-            raise Exception(f"Analysis failed: {e}")
+        return AnalysisResult(
+            username=processed_data.username,
+            performance_score=performance_score,
+            topic_proficiency=topic_proficiency,
+            weak_areas=weak_areas,
+            recommendations=recommendations,
+            suggested_problems=suggested_problems,
+            improvement_roadmap=improvement_roadmap
+        )
+
+    def analyze_users(self, users: List[LeetCodeUserData]) -> List[AnalysisResult]:
+        """Analyze many users at once, scoring them with the vectorized batch path"""
+        processed = [self.parse_user_data(data) for data in users]
+        scores = score_batch(UserBatch.from_processed(processed), self.topic_difficulty)
+        performance_scores = scores.performance_scores.tolist()
+        topic_proficiency = scores.topic_proficiency()
+        all_weak_areas = scores.weak_areas()
+        
+        results = []
+        for i, processed_data in enumerate(processed):
+            weak_areas = all_weak_areas[i]
+            level = self.performance_level(processed_data)
+            results.append(AnalysisResult(
+                username=processed_data.username,
+                performance_score=performance_scores[i],
+                topic_proficiency=topic_proficiency[i],
+                weak_areas=weak_areas,
+                recommendations=self.generate_recommendations(processed_data, weak_areas),
+                suggested_problems=self.suggest_problems(weak_areas, processed_data.solved_problems, level),
+                improvement_roadmap=self.create_improvement_roadmap(processed_data, weak_areas, level)
+            ))
+        return results
 
 # Data cleaning functions
 def clean_api_data(raw_data: str) -> str:
@@ -305,7 +406,7 @@ def parse_total_questions(total_questions_str: str) -> str:
     """Parse totalQuestions field from API format"""
     cleaned = clean_api_data(total_questions_str)
     if '/' in cleaned:
-        match = re.search(r'(\d+/\d+)', cleaned)
+        match = SOLVED_PAIR_PATTERN.search(cleaned)
         if match:
             return match.group(1)
     return cleaned
@@ -313,7 +414,7 @@ def parse_total_questions(total_questions_str: str) -> str:
 def parse_submissions(submissions_str: str) -> str:
     """Parse submissions field to extract just the number"""
     cleaned = clean_api_data(submissions_str)
-    match = re.search(r'[\d,]+', cleaned)
+    match = SUBMISSIONS_PATTERN.search(cleaned)
     if match:
         return match.group(0).replace(',', '')
     return "0"
@@ -321,14 +422,78 @@ def parse_submissions(submissions_str: str) -> str:
 def parse_streak(streak_str: str) -> str:
     """Parse streak field to extract just the number"""
     cleaned = clean_api_data(streak_str)
-    match = re.search(r'\d+', cleaned)
+    match = NUMBER_PATTERN.search(cleaned)
     if match:
         return f"Total active days:{match.group(0)}"
     return "Total active days:0"
 
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Iterable
+
+# Upstream client configuration
+UPSTREAM_URL = os.environ.get("LEETCODE_API_URL", "http://localhost:3003/leetcode/{username}")
+UPSTREAM_MAX_CONNECTIONS = int(os.environ.get("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.environ.get("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.environ.get("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", "2"))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get("UPSTREAM_READ_TIMEOUT", "15"))
+UPSTREAM_POOL_TIMEOUT = float(os.environ.get("UPSTREAM_POOL_TIMEOUT", "5"))
+
+def create_upstream_client() -> httpx.AsyncClient:
+    """Create the pooled keep-alive client used for all upstream fetches"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=UPSTREAM_CONNECT_TIMEOUT,
+            read=UPSTREAM_READ_TIMEOUT,
+            write=UPSTREAM_READ_TIMEOUT,
+            pool=UPSTREAM_POOL_TIMEOUT,
+        ),
+    )
+
+def create_cpu_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool for parsing and analysis when ANALYSIS_WORKERS > 0.
+    Read at startup so every uvicorn worker process gets its own pool.
+    """
+    workers = int(os.environ.get("ANALYSIS_WORKERS", "0"))
+    if workers <= 0:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def create_shared_store() -> Optional[SharedResultStore]:
+    """Redis-backed cache shared by all workers when ANALYSIS_REDIS_URL is set"""
+    url = os.environ.get("ANALYSIS_REDIS_URL")
+    if not url:
+        return None
+    try:
+        return SharedResultStore.from_url(url, CACHE_TTL_SECONDS)
+    except RuntimeError as e:
+        logger.warning(f"Shared analysis cache disabled: {e}")
+        return None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the upstream client, worker pool and shared cache on startup and close them on shutdown"""
+    app.state.http_client = create_upstream_client()
+    app.state.cpu_pool = create_cpu_pool()
+    app.state.shared_store = create_shared_store()
+    try:
+        yield
+    finally:
+        await app.state.http_client.aclose()
+        if app.state.cpu_pool is not None:
+            app.state.cpu_pool.shutdown(cancel_futures=True)
+        if app.state.shared_store is not None:
+            await app.state.shared_store.close()
+
 # FastAPI app
-app = FastAPI(title="LeetCode Analyzer API", version="1.0.0")
+app = FastAPI(title="LeetCode Analyzer API", version="1.0.0", lifespan=lifespan)
 analyzer = LeetCodeAnalyzer()
 app.add_middleware(
     CORSMiddleware,
@@ -337,13 +502,152 @@ app.add_middleware(
     allow_methods=["*"],        # Allow all methods (GET, POST, etc.)
     allow_headers=["*"],        # Allow all headers
 )
+
+# Analysis result cache
+CACHE_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECONDS = float(os.environ.get("ANALYSIS_CACHE_TTL", "60"))
+result_cache = ResultCache(max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS)
+
+# Service metrics exposed at /metrics
+UPSTREAM_RESPONSES = metrics.counter(
+    "analyzer_upstream_responses_total", "Upstream responses by HTTP status code", ["code"]
+)
+IN_FLIGHT_REQUESTS = metrics.gauge(
+    "analyzer_in_flight_requests", "HTTP requests currently being served"
+)
+metrics.REGISTRY.register(metrics.StatsCollector(
+    "analyzer_cache", "Analysis result cache", result_cache.stats,
+    counters=["hits", "misses", "evictions", "revalidations", "coalesced"]
+))
+
+@app.middleware("http")
+async def track_in_flight(request: Request, call_next):
+    """Count requests that are currently in progress"""
+    with IN_FLIGHT_REQUESTS.track_inprogress():
+        return await call_next(request)
+
+# Batch analysis limits
+BATCH_MAX_USERNAMES = int(os.environ.get("BATCH_MAX_USERNAMES", "500"))
+BATCH_DEFAULT_CONCURRENCY = int(os.environ.get("BATCH_DEFAULT_CONCURRENCY", "10"))
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", "50"))
+# The stream endpoint parses its whole body up front; this caps that input
+STREAM_MAX_USERNAMES = int(os.environ.get("STREAM_MAX_USERNAMES", "100000"))
+
 class AnalysisResponse(BaseModel):
     status: bool
     data: Optional[Dict] = None
     error: Optional[str] = None
 
+class BatchAnalysisRequest(BaseModel):
+    usernames: List[str]
+    concurrency: Optional[int] = None
+
+class BatchAnalysisResponse(BaseModel):
+    status: bool
+    results: List[AnalysisResponse]
+
+async def fetch_upstream_user(client: httpx.AsyncClient, username: str) -> Dict:
+    """Fetch raw user data for one username from the external API"""
+    with STAGE_LATENCY.labels(stage="upstream_fetch").time():
+        try:
+            response = await client.get(UPSTREAM_URL.format(username=username))
+        except httpx.RequestError:
+            UPSTREAM_RESPONSES.labels(code="error").inc()
+            raise
+        UPSTREAM_RESPONSES.labels(code=response.status_code).inc()
+        
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code, 
+                detail=f"Failed to fetch user data: {response.text}"
+            )
+        
+        api_response = response.json()
+    
+    if not api_response.get("success"):
+        raise HTTPException(
+            status_code=404, 
+            detail=f"User data not found: {api_response.get('message', 'Unknown error')}"
+        )
+    
+    raw_user_data = api_response.get("data")
+    if not raw_user_data:
+        raise HTTPException(status_code=404, detail="No user data found")
+    return raw_user_data
+
+def build_analysis(raw_user_data: Dict) -> Dict:
+    """Parse raw upstream data, analyze it and return the response payload"""
+    with stage_timer("parse"):
+        processed_data = analyzer.parse_raw_profile(raw_user_data)
+    result = analyzer.analyze_processed(processed_data)
+    
+    return {
+        "username": result.username,
+        "rank": processed_data.rank,
+        "performance_score": result.performance_score,
+        "topic_proficiency": result.topic_proficiency,
+        "weak_areas": result.weak_areas,
+        "recommendations": result.recommendations,
+        "suggested_problems": result.suggested_problems,
+        "improvement_roadmap": result.improvement_roadmap
+    }
+
+def build_analysis_in_worker(raw_user_data: Dict) -> Tuple[Dict, List]:
+    """build_analysis for the process pool, returning the stage timings alongside the result"""
+    global _stage_timings
+    _stage_timings = []
+    try:
+        return build_analysis(raw_user_data), _stage_timings
+    finally:
+        _stage_timings = None
+
+async def run_analysis(raw_user_data: Dict) -> Dict:
+    """Run build_analysis on the worker pool if one is configured, else inline"""
+    pool = getattr(app.state, "cpu_pool", None)
+    if pool is None:
+        return build_analysis(raw_user_data)
+    # The whole hop, including pickling and queueing, is timed here as well
+    with STAGE_LATENCY.labels(stage="worker_pool").time():
+        result, timings = await asyncio.get_running_loop().run_in_executor(
+            pool, build_analysis_in_worker, raw_user_data
+        )
+    for stage, elapsed in timings:
+        STAGE_LATENCY.labels(stage=stage).observe(elapsed)
+    return result
+
+async def analyze_username(client: httpx.AsyncClient, username: str) -> Dict:
+    """
+    Fetch and analyze a user through the result cache. Concurrent requests
+    for the same username share one upstream fetch and analysis, and an
+    unchanged upstream payload reuses the previous analysis.
+    """
+    shared_store = getattr(app.state, "shared_store", None)
+    
+    async def compute() -> Dict:
+        if shared_store is not None:
+            shared = await shared_store.get(username)
+            if shared is not None:
+                result_cache.put(username, shared.digest, shared.value)
+                return shared.value
+        
+        raw_user_data = await fetch_upstream_user(client, username)
+        digest = payload_digest(raw_user_data)
+        cached = result_cache.revalidate(username, digest)
+        if cached is None:
+            result_dict = await run_analysis(raw_user_data)
+            print(f"✅ Successfully processed data for {username}")
+            result_cache.put(username, digest, result_dict)
+        else:
+            result_dict = cached
+        
+        if shared_store is not None:
+            await shared_store.put(username, digest, result_dict)
+        return result_dict
+    
+    return await result_cache.get_or_compute(username, compute)
+
 @app.get("/analyze/{username}", response_model=AnalysisResponse)
-async def analyze_user(username: str):
+async def analyze_user(username: str, request: Request):
     """
     Analyze a LeetCode user's performance by fetching data from external API
     """
@@ -352,63 +656,13 @@ async def analyze_user(username: str):
     
     try:
         print(f"🔍 Fetching data for user: {username}")
-        
-        # Fetch user data from the external API
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"http://localhost:3003/leetcode/{username}")
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code, 
-                    detail=f"Failed to fetch user data: {response.text}"
-                )
-            
-            api_response = response.json()
-            
-            if not api_response.get("success"):
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"User data not found: {api_response.get('message', 'Unknown error')}"
-                )
-            
-            raw_user_data = api_response.get("data")
-            if not raw_user_data:
-                raise HTTPException(status_code=404, detail="No user data found")
-        
-        # Clean and process the API data
-        cleaned_rank = clean_api_data(raw_user_data.get("rank", ""))
-        cleaned_total_questions = parse_total_questions(raw_user_data.get("totalQuestions", ""))
-        cleaned_submissions = parse_submissions(raw_user_data.get("submissions", ""))
-        cleaned_streak = parse_streak(raw_user_data.get("streak", ""))
-        
-        # Create LeetCodeUserData object
-        user_data = LeetCodeUserData(
-            username=raw_user_data.get("username", ""),
-            rank=cleaned_rank,
-            totalQuestions=cleaned_total_questions,
-            languages=raw_user_data.get("languages", []),
-            skills=raw_user_data.get("skills", []),
-            submissions=cleaned_submissions,
-            streak=cleaned_streak
-        )
-        
-        print(f"✅ Successfully processed data for {username}")
-        
-        # Analyze the user data
-        result = analyzer.analyze_user(user_data)
-        
-        result_dict = {
-            "username": result.username,
-            "rank": cleaned_rank,
-            "performance_score": result.performance_score,
-            "topic_proficiency": result.topic_proficiency,
-            "weak_areas": result.weak_areas,
-            "recommendations": result.recommendations,
-            "suggested_problems": result.suggested_problems,
-            "improvement_roadmap": result.improvement_roadmap
-        }
-        
-        return AnalysisResponse(status=True, data=result_dict)
+        result_dict = await analyze_username(request.app.state.http_client, username)
+        with STAGE_LATENCY.labels(stage="serialization").time():
+            body = json.dumps(
+                {"status": True, "data": result_dict, "error": None},
+                ensure_ascii=False, separators=(",", ":")
+            )
+        return Response(content=body, media_type="application/json")
         
     except HTTPException:
         raise
@@ -422,10 +676,148 @@ async def analyze_user(username: str):
         print(f"❌ Error analyzing user {username}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def describe_error(error: Exception) -> str:
+    """Turn an analysis failure into the message reported for a batch entry"""
+    if isinstance(error, HTTPException):
+        return str(error.detail)
+    if isinstance(error, httpx.RequestError):
+        return f"Failed to connect to data source: {str(error)}"
+    return str(error)
+
+def clamp_concurrency(requested: Optional[int]) -> int:
+    """Apply the default and the upper bound to a requested concurrency"""
+    return max(1, min(requested or BATCH_DEFAULT_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+
+async def analysis_entry(client: httpx.AsyncClient, username: str) -> Dict:
+    """Analyze one user for a multi-user request, reporting failures in the entry"""
+    if not username:
+        return {"status": False, "data": {"username": username}, "error": "Username is required"}
+    try:
+        result_dict = await analyze_username(client, username)
+        return {"status": True, "data": result_dict, "error": None}
+    except asyncio.CancelledError:
+        # Our own cancellation (client gone) must propagate; a cancellation
+        # that leaked in from shared work only fails this entry
+        if asyncio.current_task().cancelling():
+            raise
+        print(f"❌ Analysis of {username} was cancelled")
+        return {"status": False, "data": {"username": username}, "error": "Analysis was cancelled"}
+    except Exception as e:
+        print(f"❌ Error analyzing user {username}: {describe_error(e)}")
+        return {"status": False, "data": {"username": username}, "error": describe_error(e)}
+
+async def stream_analyses(client: httpx.AsyncClient, usernames: Iterable[str],
+                          concurrency: int) -> AsyncIterator[bytes]:
+    """
+    Yield one NDJSON line per user in completion order. At most
+    `concurrency` analyses are in flight, so memory does not grow with the
+    length of the username list.
+    """
+    async def run(username: str) -> bytes:
+        entry = await analysis_entry(client, username)
+        return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+    
+    pending = set()
+    try:
+        for username in usernames:
+            pending.add(asyncio.ensure_future(run(username)))
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # The client went away before the stream finished
+        for task in pending:
+            task.cancel()
+
+@app.post("/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_batch(batch: BatchAnalysisRequest, request: Request):
+    """
+    Analyze several users at once. Upstream fetches run concurrently up to
+    the requested concurrency, and each user gets its own success or error
+    entry so one bad username does not fail the whole batch.
+    """
+    if not batch.usernames:
+        raise HTTPException(status_code=400, detail="At least one username is required")
+    if len(batch.usernames) > BATCH_MAX_USERNAMES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch size {len(batch.usernames)} exceeds the limit of {BATCH_MAX_USERNAMES}"
+        )
+    
+    concurrency = clamp_concurrency(batch.concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    client = request.app.state.http_client
+    
+    async def analyze_one(username: str) -> AnalysisResponse:
+        async with semaphore:
+            return AnalysisResponse(**await analysis_entry(client, username))
+    
+    print(f"🔍 Analyzing batch of {len(batch.usernames)} users (concurrency {concurrency})")
+    results = await asyncio.gather(*(analyze_one(username) for username in batch.usernames))
+    return BatchAnalysisResponse(status=True, results=list(results))
+
+@app.post("/analyze/stream")
+async def analyze_stream(batch: BatchAnalysisRequest, request: Request):
+    """
+    Analyze a long list of users and stream each result as an NDJSON line
+    as soon as it finishes. Lines have the same shape as /analyze responses.
+    Only the output is streamed: the request body is parsed in full before
+    the first line is sent, so STREAM_MAX_USERNAMES is what bounds the
+    memory one request can take. Split longer lists across requests.
+    """
+    if len(batch.usernames) > STREAM_MAX_USERNAMES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Stream size {len(batch.usernames)} exceeds the limit of {STREAM_MAX_USERNAMES}"
+        )
+    
+    concurrency = clamp_concurrency(batch.concurrency)
+    print(f"🔍 Streaming analysis of {len(batch.usernames)} users (concurrency {concurrency})")
+    return StreamingResponse(
+        stream_analyses(request.app.state.http_client, batch.usernames, concurrency),
+        media_type="application/x-ndjson"
+    )
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Stage latency histograms, upstream status codes, in-flight requests and cache stats"""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Result cache hit, miss and eviction counters"""
+    return result_cache.stats()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "LeetCode Analyzer API is running"}
 
 if __name__ == '__main__':
-    uvicorn.run(app, host="0.0.0.0", port=3002)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="LeetCode Analyzer API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=3002)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn worker processes, each with its own event loop")
+    parser.add_argument("--cpu-workers", type=int, default=None,
+                        help="analysis worker processes per uvicorn worker (0 runs analysis inline)")
+    parser.add_argument("--redis-url", default=None,
+                        help="share warm analysis results between workers through Redis")
+    args = parser.parse_args()
+    
+    # Settings travel through the environment so uvicorn's worker processes see them
+    if args.cpu_workers is not None:
+        os.environ["ANALYSIS_WORKERS"] = str(args.cpu_workers)
+    if args.redis_url:
+        os.environ["ANALYSIS_REDIS_URL"] = args.redis_url
+    
+    if args.workers > 1:
+        uvicorn.run("fetch:app", host=args.host, port=args.port, workers=args.workers,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
\ No newline at end of file
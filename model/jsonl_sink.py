@@ -0,0 +1,127 @@
+"""
+Streaming JSON Lines output for LeetCodeUserCollector.
+
+JsonlSink appends each record as one compact line as soon as it is written,
+optionally gzip-compressed (the default for paths ending in .gz), and
+flushes and fsyncs every `fsync_every` records or `fsync_interval` seconds,
+so memory stays flat and a crash loses at most the records since the last
+sync. Reopening a file after a crash first drops the partial last line (or
+the unreadable tail of a gzip file), then keeps appending.
+
+    with JsonlSink("leetcode_users_detailed.jsonl.gz") as sink:
+        sink.write(profile)
+
+    for profile in read_jsonl("leetcode_users_detailed.jsonl.gz"):
+        ...
+"""
+import gzip
+import json
+import os
+import time
+import zlib
+from typing import Dict, Iterable, Iterator, Optional
+
+
+def _is_gzip(path: str) -> bool:
+    return path.endswith(".gz")
+
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    """Records from a JSONL or JSONL.gz file, stopping quietly at a truncated tail"""
+    opener = gzip.open if _is_gzip(path) else open
+    with opener(path, 'rb') as f:
+        try:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                if line.strip():
+                    yield json.loads(line)
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            return
+
+
+def _repair(path: str, compress: bool) -> None:
+    """Cut a file left behind by a crash back to its last complete line"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    if not compress:
+        with open(path, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            position = end
+            # Walk back from the end to the last newline
+            while position > 0:
+                step = min(65536, position)
+                f.seek(position - step)
+                newline = f.read(step).rfind(b"\n")
+                if newline >= 0:
+                    position = position - step + newline + 1
+                    break
+                position -= step
+            if position < end:
+                f.truncate(position)
+        return
+    try:
+        with gzip.open(path, 'rb') as f:
+            while f.read(1 << 20):
+                pass
+        return
+    except (EOFError, zlib.error, gzip.BadGzipFile):
+        pass
+    # A gzip member without its trailer cannot be appended to; rewrite what is readable
+    tmp = path + ".repair"
+    with gzip.open(tmp, 'wb') as out:
+        for record in read_jsonl(path):
+            out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode('utf-8') + b"\n")
+    os.replace(tmp, path)
+
+
+class JsonlSink:
+    def __init__(self, path: str, compress: Optional[bool] = None, fsync_every: int = 100,
+                 fsync_interval: float = 5.0):
+        self.path = path
+        self.compress = _is_gzip(path) if compress is None else compress
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        _repair(path, self.compress)
+        self._raw = open(path, 'ab')
+        # Each open appends a new gzip member; readers see the members as one stream
+        self._file = gzip.GzipFile(fileobj=self._raw, mode='ab') if self.compress else self._raw
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def __enter__(self) -> "JsonlSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode('utf-8') + b"\n")
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._synced_at >= self.fsync_interval:
+            self.sync()
+
+    def write_many(self, records: Iterable[Dict]) -> None:
+        for record in records:
+            self.write(record)
+
+    def sync(self) -> None:
+        """Push everything written so far to disk; gzip output stays decodable up to here"""
+        if self.compress:
+            self._file.flush(zlib.Z_SYNC_FLUSH)
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def close(self) -> None:
+        if self._raw.closed:
+            return
+        if self.compress:
+            self._file.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
@@ -1,54 +1,184 @@
+import argparse
+import asyncio
+import math
+import os
 import requests
+import httpx
 import json
 import time
 import random
-from typing import List, Dict, Optional
+from functools import lru_cache
+from collections import deque
+from typing import AsyncIterator, Iterator, List, Dict, Optional
 
-class LeetCodeUserCollector:
-    def __init__(self):
-        self.base_url = "https://leetcode.com/graphql"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Content-Type': 'application/json',
-            'Referer': 'https://leetcode.com/'
-        })
-    
-    def get_user_profile(self, username: str) -> Optional[Dict]:
-        """Get detailed profile information for a specific user"""
-        query = """
-        query getUserProfile($username: String!) {
-            matchedUser(username: $username) {
+from crawl_state import CrawlState
+from jsonl_sink import JsonlSink
+from seen_index import SeenIndex
+from user_store import UserStore
+
+GRAPHQL_URL = "https://leetcode.com/graphql"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Content-Type': 'application/json',
+    'Referer': 'https://leetcode.com/'
+}
+
+USER_PROFILE_FIELDS = """
+        username
+        profile {
+            realName
+            aboutMe
+            country
+            company
+            school
+            websites
+            ranking
+        }
+        submitStats: submitStatsGlobal {
+            acSubmissionNum {
+                difficulty
+                count
+                submissions
+            }
+        }
+        badges {
+            id
+            displayName
+            icon
+            creationDate
+        }
+"""
+
+USER_PROFILE_QUERY = (
+    "query getUserProfile($username: String!) {\n"
+    "    matchedUser(username: $username) {" + USER_PROFILE_FIELDS + "    }\n"
+    "}\n"
+)
+
+CONTEST_RANKING_QUERY = """
+query contestRanking($contestSlug: String!, $page: Int!) {
+    contestRanking(contestSlug: $contestSlug, page: $page) {
+        userContestRanking {
+            user {
                 username
                 profile {
                     realName
-                    aboutMe
                     country
-                    company
-                    school
-                    websites
-                    ranking
                 }
-                submitStats: submitStatsGlobal {
-                    acSubmissionNum {
-                        difficulty
-                        count
-                        submissions
-                    }
-                }
-                badges {
-                    id
-                    displayName
-                    icon
-                    creationDate
+            }
+            rank
+            score
+            finishTimeInSeconds
+        }
+    }
+}
+"""
+
+GLOBAL_RANKING_QUERY = """
+query globalRanking($page: Int!) {
+    globalRanking(page: $page) {
+        rankingNodes {
+            user {
+                username
+                profile {
+                    realName
+                    country
+                    ranking
                 }
             }
+            problemsSolved
+            ranking
         }
-        """
-        
+    }
+}
+"""
+
+
+@lru_cache(maxsize=None)
+def profile_batch_query(count: int) -> str:
+    """One document looking up `count` users, aliased u0..u<count-1> with variables of the same names"""
+    variables = ", ".join(f"$u{i}: String!" for i in range(count))
+    lookups = "".join(
+        f"    u{i}: matchedUser(username: $u{i}) {{{USER_PROFILE_FIELDS}    }}\n" for i in range(count)
+    )
+    return f"query getUserProfiles({variables}) {{\n{lookups}}}\n"
+
+
+def profile_batch_variables(usernames: List[str]) -> Dict[str, str]:
+    return {f"u{i}": username for i, username in enumerate(usernames)}
+
+
+def graphql_error(body: Optional[Dict], alias: Optional[str] = None) -> str:
+    """Why a response holds no profile: its GraphQL error messages (only alias's, if given) or "user not found" """
+    messages = [
+        error.get('message') or "unknown error"
+        for error in (body or {}).get('errors') or []
+        if alias is None or (error.get('path') or [None])[0] == alias
+    ]
+    return "; ".join(messages) or "user not found"
+
+
+def split_profile_batch(usernames: List[str], body: Dict,
+                        errors: Optional[Dict[str, str]] = None) -> Dict[str, Optional[Dict]]:
+    """
+    Per-user results from a batched response. An alias that errored or
+    matched no user maps to None without affecting the others, and its
+    reason is stored in errors when given.
+    """
+    data = body.get('data') or {}
+    for error in body.get('errors') or []:
+        path = error.get('path') or []
+        if path and isinstance(path[0], str) and path[0].startswith('u') and path[0][1:].isdigit():
+            index = int(path[0][1:])
+            if index < len(usernames):
+                print(f"Error fetching user {usernames[index]}: {error.get('message')}")
+    profiles = {username: data.get(f"u{i}") for i, username in enumerate(usernames)}
+    if errors is not None:
+        for i, username in enumerate(usernames):
+            if profiles[username] is None:
+                errors[username] = graphql_error(body, f"u{i}")
+    return profiles
+
+
+def pending_profiles(usernames: List[str], seen: Optional[SeenIndex],
+                     state: Optional[CrawlState]) -> List[str]:
+    """Usernames, deduplicated and in order, whose profiles still need fetching"""
+    unique = list(dict.fromkeys(usernames))
+    pending = list(state.unfinished(unique)) if state is not None else unique
+    if len(pending) < len(unique):
+        print(f"Skipping {len(unique) - len(pending)} users the crawl state already finished")
+    return [username for username in pending if seen is None or username not in seen]
+
+
+def record_profile(username: str, profile: Optional[Dict], seen: Optional[SeenIndex],
+                   state: Optional[CrawlState], sink: Optional[JsonlSink] = None,
+                   error: Optional[str] = None) -> None:
+    if profile and sink is not None:
+        sink.write(profile)
+    if state is not None:
+        if profile:
+            state.record_profile(username, profile)
+        elif error:
+            state.record_failure(username, error)
+        else:
+            state.record_failure(username)
+    if profile and seen is not None:
+        seen.add(username)
+
+
+class LeetCodeUserCollector:
+    def __init__(self):
+        self.base_url = GRAPHQL_URL
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        # Why the last fetch of a username returned no profile; taken when its outcome is recorded
+        self.errors: Dict[str, str] = {}
+    
+    def get_user_profile(self, username: str) -> Optional[Dict]:
+        """Get detailed profile information for a specific user"""
         variables = {"username": username}
         payload = {
-            "query": query,
+            "query": USER_PROFILE_QUERY,
             "variables": variables
         }
         
@@ -58,38 +188,46 @@ class LeetCodeUserCollector:
                 data = response.json()
                 if data.get('data', {}).get('matchedUser'):
                     return data['data']['matchedUser']
+                self.errors[username] = graphql_error(data)
+            else:
+                self.errors[username] = f"HTTP {response.status_code}"
             return None
         except Exception as e:
             print(f"Error fetching user {username}: {e}")
+            self.errors[username] = str(e)
             return None
+
+    def get_user_profiles(self, usernames: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Profiles for several users from one aliased GraphQL request. If the
+        batch request itself fails, each user is fetched on its own instead.
+        """
+        if len(usernames) == 1:
+            return {usernames[0]: self.get_user_profile(usernames[0])}
+        payload = {
+            "query": profile_batch_query(len(usernames)),
+            "variables": profile_batch_variables(usernames)
+        }
+
+        try:
+            response = self.session.post(self.base_url, json=payload)
+            if response.status_code == 200:
+                body = response.json()
+                if body.get('data'):
+                    return split_profile_batch(usernames, body, self.errors)
+            print(f"Batch of {len(usernames)} users failed, fetching them one by one")
+        except Exception as e:
+            print(f"Error fetching batch of {len(usernames)} users: {e}")
+        return {username: self.get_user_profile(username) for username in usernames}
     
     def get_contest_ranking(self, contest_slug: str, page: int = 1) -> List[Dict]:
         """Get users from contest rankings"""
-        query = """
-        query contestRanking($contestSlug: String!, $page: Int!) {
-            contestRanking(contestSlug: $contestSlug, page: $page) {
-                userContestRanking {
-                    user {
-                        username
-                        profile {
-                            realName
-                            country
-                        }
-                    }
-                    rank
-                    score
-                    finishTimeInSeconds
-                }
-            }
-        }
-        """
-        
         variables = {
             "contestSlug": contest_slug,
             "page": page
         }
         payload = {
-            "query": query,
+            "query": CONTEST_RANKING_QUERY,
             "variables": variables
         }
         
@@ -106,28 +244,9 @@ class LeetCodeUserCollector:
     
     def get_global_ranking(self, page: int = 1) -> List[Dict]:
         """Get users from global ranking"""
-        query = """
-        query globalRanking($page: Int!) {
-            globalRanking(page: $page) {
-                rankingNodes {
-                    user {
-                        username
-                        profile {
-                            realName
-                            country
-                            ranking
-                        }
-                    }
-                    problemsSolved
-                    ranking
-                }
-            }
-        }
-        """
-        
         variables = {"page": page}
         payload = {
-            "query": query,
+            "query": GLOBAL_RANKING_QUERY,
             "variables": variables
         }
         
@@ -142,18 +261,42 @@ class LeetCodeUserCollector:
             print(f"Error fetching global rankings: {e}")
             return []
 
-    def collect_users(self, target_count: int = 100, method: str = "global_ranking") -> List[Dict]:
+    def collect_users(self, target_count: int = 100, method: str = "global_ranking",
+                      seen: Optional[SeenIndex] = None, state: Optional[CrawlState] = None,
+                      sink: Optional[JsonlSink] = None) -> List[Dict]:
         """
-        Collect users using specified method
+        Collect users using specified method, skipping usernames already in seen
+        and resuming from the pages already recorded in state; new users are
+        written to sink page by page
         Methods: 'global_ranking', 'contest_ranking'
         """
-        users = []
+        return list(self.iter_users(target_count, method, seen, state, sink))
+
+    def iter_users(self, target_count: int = 100, method: str = "global_ranking",
+                   seen: Optional[SeenIndex] = None, state: Optional[CrawlState] = None,
+                   sink: Optional[JsonlSink] = None) -> Iterator[Dict]:
+        """
+        collect_users as a generator. Users restored from state come first and
+        are not written to sink again; only usernames are kept in memory.
+        """
+        collected = set()
+        count = 0
         page = 1
+        if state is not None:
+            page = state.next_page(method)
+            for user in state.iter_collected_users(method):
+                if count >= target_count:
+                    return
+                collected.add(user['username'])
+                count += 1
+                yield user
+            if count:
+                print(f"Resuming at page {page} with {count} users already collected")
         
         print(f"Collecting {target_count} users using {method} method...")
         
-        while len(users) < target_count:
-            print(f"Fetching page {page}... (Current count: {len(users)})")
+        while count < target_count:
+            print(f"Fetching page {page}... (Current count: {count})")
             
             if method == "global_ranking":
                 page_users = self.get_global_ranking(page)
@@ -169,57 +312,479 @@ class LeetCodeUserCollector:
                 print("No more users found or API limit reached")
                 break
             
+            # Only users within the target are written and recorded
+            new_users = []
             for user in page_users:
-                if len(users) >= target_count:
+                if count + len(new_users) >= target_count:
                     break
-                if user['username'] not in [u['username'] for u in users]:
-                    users.append(user)
+                username = user['username']
+                if username not in collected and (seen is None or username not in seen):
+                    collected.add(username)
+                    new_users.append(user)
+            if sink is not None:
+                sink.write_many(new_users)
+            if state is not None:
+                state.record_page(method, page, new_users)
+            count += len(new_users)
+            yield from new_users
             
             page += 1
             # Add delay to respect rate limits
             time.sleep(random.uniform(1, 3))
         
-        print(f"Collected {len(users)} users")
-        return users[:target_count]
+        print(f"Collected {count} users")
     
-    def get_detailed_user_info(self, usernames: List[str]) -> List[Dict]:
-        """Get detailed information for a list of usernames"""
-        detailed_users = []
+    def get_detailed_user_info(self, usernames: List[str], seen: Optional[SeenIndex] = None,
+                               batch_size: int = 1, state: Optional[CrawlState] = None,
+                               sink: Optional[JsonlSink] = None) -> List[Dict]:
+        """
+        Get detailed information for a list of usernames, skipping and then
+        recording them in seen; batch_size > 1 packs that many users per request.
+        With a state, only users it has not finished are fetched and every
+        outcome is recorded.
+        """
+        return list(self.iter_detailed_user_info(usernames, seen, batch_size, state, sink))
+
+    def iter_detailed_user_info(self, usernames: List[str], seen: Optional[SeenIndex] = None,
+                                batch_size: int = 1, state: Optional[CrawlState] = None,
+                                sink: Optional[JsonlSink] = None) -> Iterator[Dict]:
+        """get_detailed_user_info as a generator holding one batch of profiles at a time"""
+        pending = pending_profiles(usernames, seen, state)
+        total = len(pending)
         
-        for i, username in enumerate(usernames):
-            print(f"Fetching detailed info for {username} ({i+1}/{len(usernames)})")
+        for start in range(0, total, batch_size):
+            batch = pending[start:start + batch_size]
+            print(f"Fetching detailed info for {', '.join(batch)} ({start + len(batch)}/{total})")
             
-            user_data = self.get_user_profile(username)
-            if user_data:
-                detailed_users.append(user_data)
+            profiles = self.get_user_profiles(batch)
+            for name in batch:
+                record_profile(name, profiles.get(name), seen, state, sink, self.errors.pop(name, None))
             
             # Rate limiting
             time.sleep(random.uniform(0.5, 2))
-        
-        return detailed_users
+            for name in batch:
+                if profiles.get(name):
+                    yield profiles[name]
     
-    def save_to_json(self, users: List[Dict], filename: str = "leetcode_users.json"):
-        """Save users data to JSON file"""
+    def save_to_json(self, users: List[Dict], filename: str = "leetcode_users.json", merge: bool = False):
+        """Save users data to JSON file; with merge, users already in the file are kept"""
+        if merge and os.path.exists(filename):
+            with open(filename, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+            fresh = {user.get('username') for user in users}
+            users = [user for user in existing if user.get('username') not in fresh] + users
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(users, f, indent=2, ensure_ascii=False)
         print(f"Data saved to {filename}")
 
+    def save_to_store(self, users: List[Dict], path: str = "leetcode_users"):
+        """Append users to the columnar store as a new partition"""
+        partition = UserStore(path).append(users)
+        print(f"Data appended to {partition or path}")
+
+
+class TokenBucket:
+    """
+    Async token bucket allowing `rate` requests per second on average and
+    bursts of up to `capacity`. Waiters are served in arrival order.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncLeetCodeUserCollector:
+    """
+    Concurrent version of LeetCodeUserCollector. Up to `concurrency`
+    requests are in flight and a token bucket paces them to `rate` requests
+    per second, replacing the fixed sleeps; 429 and 5xx responses are
+    retried after Retry-After or an exponential backoff.
+
+        async with AsyncLeetCodeUserCollector(rate=5, concurrency=10) as collector:
+            users = await collector.collect_users(1000)
+            detailed = await collector.get_detailed_user_info([u['username'] for u in users])
+    """
+    def __init__(self, rate: float = 2.0, burst: Optional[float] = None, concurrency: int = 8,
+                 max_retries: int = 3, timeout: float = 30.0, base_url: str = GRAPHQL_URL):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.limiter = TokenBucket(rate, burst)
+        # Why the last fetch of a username returned no profile; taken when its outcome is recorded
+        self.errors: Dict[str, str] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+
+    async def __aenter__(self) -> "AsyncLeetCodeUserCollector":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.client.aclose()
+
+    async def _post(self, query: str, variables: Dict) -> Dict:
+        """
+        The decoded GraphQL response. A request that fails for good yields a
+        body holding only `errors`, describing the last failure.
+        """
+        payload = {"query": query, "variables": variables}
+        failure = "not fetched"
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            retry_after = None
+            async with self._semaphore:
+                try:
+                    response = await self.client.post(self.base_url, json=payload)
+                except httpx.HTTPError as e:
+                    print(f"Request failed ({e}), attempt {attempt + 1}")
+                    failure = str(e) or type(e).__name__
+                    response = None
+            if response is not None:
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError as e:
+                        # An HTML error page or a cut-off body; retried like a server error
+                        print(f"Unreadable response ({e}), attempt {attempt + 1}")
+                        failure = f"unreadable response: {e}"
+                else:
+                    failure = f"HTTP {response.status_code}"
+                    if response.status_code != 429 and response.status_code < 500:
+                        break
+                retry_after = response.headers.get('Retry-After')
+            if attempt < self.max_retries:
+                try:
+                    delay = float(retry_after)
+                except (TypeError, ValueError):
+                    delay = random.uniform(0, min(30.0, 2 ** attempt))
+                await asyncio.sleep(delay)
+        return {"errors": [{"message": failure}]}
+
+    async def get_user_profile(self, username: str) -> Optional[Dict]:
+        """Get detailed profile information for a specific user"""
+        body = await self._post(USER_PROFILE_QUERY, {"username": username})
+        profile = (body.get('data') or {}).get('matchedUser')
+        if profile is None:
+            self.errors[username] = graphql_error(body)
+        return profile
+
+    async def get_user_profiles(self, usernames: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Profiles for several users from one aliased GraphQL request. If the
+        batch request itself fails, each user is fetched on its own instead.
+        """
+        if len(usernames) == 1:
+            return {usernames[0]: await self.get_user_profile(usernames[0])}
+        body = await self._post(profile_batch_query(len(usernames)), profile_batch_variables(usernames))
+        if body.get('data'):
+            return split_profile_batch(usernames, body, self.errors)
+        print(f"Batch of {len(usernames)} users failed, fetching them one by one")
+        profiles = await asyncio.gather(*(self.get_user_profile(username) for username in usernames))
+        return dict(zip(usernames, profiles))
+
+    async def get_contest_ranking(self, contest_slug: str, page: int = 1) -> List[Dict]:
+        """Get users from contest rankings"""
+        body = await self._post(CONTEST_RANKING_QUERY, {"contestSlug": contest_slug, "page": page})
+        rankings = (((body or {}).get('data') or {}).get('contestRanking') or {}).get('userContestRanking') or []
+        return [ranking['user'] for ranking in rankings if ranking.get('user')]
+
+    async def get_global_ranking(self, page: int = 1) -> List[Dict]:
+        """Get users from global ranking"""
+        body = await self._post(GLOBAL_RANKING_QUERY, {"page": page})
+        rankings = (((body or {}).get('data') or {}).get('globalRanking') or {}).get('rankingNodes') or []
+        return [ranking['user'] for ranking in rankings if ranking.get('user')]
+
+    async def _ranking_page(self, method: str, page: int) -> List[Dict]:
+        if method == "global_ranking":
+            return await self.get_global_ranking(page)
+        # You'll need to replace with actual contest slug
+        return await self.get_contest_ranking("weekly-contest-300", page)
+
+    async def collect_users(self, target_count: int = 100, method: str = "global_ranking",
+                            seen: Optional[SeenIndex] = None, state: Optional[CrawlState] = None,
+                            sink: Optional[JsonlSink] = None) -> List[Dict]:
+        """
+        Collect users using specified method, fetching ranking pages concurrently,
+        skipping usernames already in seen and resuming from the pages in state;
+        new users are written to sink page by page
+        Methods: 'global_ranking', 'contest_ranking'
+        """
+        return [user async for user in self.iter_users(target_count, method, seen, state, sink)]
+
+    async def iter_users(self, target_count: int = 100, method: str = "global_ranking",
+                         seen: Optional[SeenIndex] = None, state: Optional[CrawlState] = None,
+                         sink: Optional[JsonlSink] = None) -> AsyncIterator[Dict]:
+        """
+        collect_users as an async generator. Users restored from state come
+        first and are not written to sink again; only usernames are kept in memory.
+        """
+        if method not in ("global_ranking", "contest_ranking"):
+            print(f"Unknown method: {method}")
+            return
+
+        collected = set()
+        count = 0
+        page = 1
+        per_page = None
+        if state is not None:
+            page = state.next_page(method)
+            for user in state.iter_collected_users(method):
+                if count >= target_count:
+                    return
+                collected.add(user['username'])
+                count += 1
+                yield user
+            if count:
+                print(f"Resuming at page {page} with {count} users already collected")
+
+        print(f"Collecting {target_count} users using {method} method...")
+
+        while count < target_count:
+            # The first page tells how many users a page holds; after that only
+            # as many pages as the target still needs are requested at once
+            remaining = target_count - count
+            wave = 1 if per_page is None else min(self.concurrency, math.ceil(remaining / per_page))
+            print(f"Fetching pages {page}-{page + wave - 1}... (Current count: {count})")
+            pages = await asyncio.gather(*(self._ranking_page(method, p) for p in range(page, page + wave)))
+            page += wave
+
+            exhausted = False
+            for number, page_users in enumerate(pages, start=page - wave):
+                if count >= target_count:
+                    # Pages past the target stay unrecorded, so a larger target fetches them later
+                    break
+                if not page_users:
+                    exhausted = True
+                    break
+                per_page = per_page or len(page_users)
+                # Only users within the target are written and recorded
+                new_users = []
+                for user in page_users:
+                    if count + len(new_users) >= target_count:
+                        break
+                    username = user['username']
+                    if username not in collected and (seen is None or username not in seen):
+                        collected.add(username)
+                        new_users.append(user)
+                if sink is not None:
+                    sink.write_many(new_users)
+                if state is not None:
+                    state.record_page(method, number, new_users)
+                count += len(new_users)
+                for user in new_users:
+                    yield user
+            if exhausted:
+                print("No more users found or API limit reached")
+                break
+
+        print(f"Collected {count} users")
+
+    async def get_detailed_user_info(self, usernames: List[str], seen: Optional[SeenIndex] = None,
+                                     batch_size: int = 1, state: Optional[CrawlState] = None,
+                                     sink: Optional[JsonlSink] = None) -> List[Dict]:
+        """
+        Get detailed information for a list of usernames, keeping their order;
+        usernames in seen are skipped and fetched ones are added to it.
+        batch_size > 1 packs that many users into each request. With a state,
+        only users it has not finished are fetched and every outcome is recorded.
+        """
+        return [user async for user in self.iter_detailed_user_info(usernames, seen, batch_size, state, sink)]
+
+    async def iter_detailed_user_info(self, usernames: List[str], seen: Optional[SeenIndex] = None,
+                                      batch_size: int = 1, state: Optional[CrawlState] = None,
+                                      sink: Optional[JsonlSink] = None) -> AsyncIterator[Dict]:
+        """
+        get_detailed_user_info as an async generator. At most `concurrency`
+        batches are in flight and profiles are yielded in input order, so
+        memory stays bounded however many usernames are given.
+        """
+        pending = pending_profiles(usernames, seen, state)
+        batches = (pending[start:start + batch_size] for start in range(0, len(pending), batch_size))
+        total = len(pending)
+        window = deque()
+        done = 0
+
+        def schedule():
+            while len(window) < self.concurrency:
+                batch = next(batches, None)
+                if batch is None:
+                    return
+                window.append((batch, asyncio.ensure_future(self.get_user_profiles(batch))))
+
+        try:
+            schedule()
+            while window:
+                batch, task = window.popleft()
+                profiles = await task
+                schedule()
+                for name in batch:
+                    record_profile(name, profiles.get(name), seen, state, sink, self.errors.pop(name, None))
+                done += len(batch)
+                if done // 50 > (done - len(batch)) // 50 or done == total:
+                    print(f"Fetched detailed info for {done}/{total} users")
+                for name in batch:
+                    if profiles.get(name):
+                        yield profiles[name]
+        finally:
+            for _, task in window:
+                task.cancel()
+
+STORE_CHUNK = 1000
+
+
+class UserTally:
+    """Count, countries and the first `keep` usernames of a stream of users, without holding the users"""
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self.count = 0
+        self.usernames: List[str] = []
+        self.countries: Dict[str, int] = {}
+
+    def add(self, user: Dict) -> None:
+        self.count += 1
+        if user.get('username') and len(self.usernames) < self.keep:
+            self.usernames.append(user['username'])
+        if user.get('profile'):
+            country = user['profile'].get('country', 'Unknown')
+            self.countries[country] = self.countries.get(country, 0) + 1
+
+    def top_countries(self, limit: int = 5) -> Dict[str, int]:
+        return dict(sorted(self.countries.items(), key=lambda x: x[1], reverse=True)[:limit])
+
+
+class StoreWriter:
+    """Appends profiles to the columnar store STORE_CHUNK at a time; leaving the block saves the rest"""
+
+    def __init__(self, path: str = "leetcode_users", size: int = STORE_CHUNK):
+        self.store = UserStore(path)
+        self.size = size
+        self.chunk: List[Dict] = []
+
+    def __enter__(self) -> "StoreWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        # Also on errors and Ctrl-C, so profiles already marked done in the crawl state are not lost
+        self.flush()
+
+    def add(self, user: Dict) -> None:
+        self.chunk.append(user)
+        if len(self.chunk) >= self.size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.chunk:
+            self.store.append(self.chunk)
+            self.chunk = []
+
+
+async def collect_async(args, seen: Optional[SeenIndex], state: Optional[CrawlState], tally: UserTally,
+                        basic_sink: Optional[JsonlSink] = None, detailed_sink: Optional[JsonlSink] = None):
+    async with AsyncLeetCodeUserCollector(rate=args.rate, concurrency=args.concurrency) as collector:
+        # Only JSON output needs every user in memory
+        users = [] if basic_sink is None else None
+        async for user in collector.iter_users(target_count=args.users, method=args.method, seen=seen,
+                                               state=state, sink=basic_sink):
+            tally.add(user)
+            if users is not None:
+                users.append(user)
+        profiles = collector.iter_detailed_user_info(tally.usernames, seen=seen, batch_size=args.batch_size,
+                                                     state=state, sink=detailed_sink)
+        if detailed_sink is None:
+            return users, [user async for user in profiles]
+        # Streaming: profiles go to the sink and to the store in chunks, never all in memory
+        with StoreWriter("leetcode_users") as store:
+            async for user in profiles:
+                store.add(user)
+    return users, None
+
 # Example usage
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect LeetCode users")
+    parser.add_argument("--users", type=int, default=100, help="users to collect from rankings")
+    parser.add_argument("--detailed", type=int, default=50, help="users to fetch detailed profiles for")
+    parser.add_argument("--method", default="global_ranking", choices=["global_ranking", "contest_ranking"])
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="fetch concurrently under a token-bucket rate limit")
+    parser.add_argument("--rate", type=float, default=2.0, help="requests per second in --async mode")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight in --async mode")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="users per aliased GraphQL request when fetching detailed profiles")
+    parser.add_argument("--seen",
+                        help="index of already collected usernames (e.g. leetcode_users.seen) to skip on repeat "
+                             "crawls; new users are then merged into the existing JSON output")
+    parser.add_argument("--state", help="SQLite crawl state; rerunning with the same file resumes the crawl")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="stream users to .jsonl files as they arrive instead of writing JSON at the end")
+    parser.add_argument("--gzip", action="store_true", help="gzip the --jsonl output")
+    parser.add_argument("--fsync-every", type=int, default=100, help="records between fsyncs of --jsonl output")
+    args = parser.parse_args()
+
     collector = LeetCodeUserCollector()
-    
-    # Method 1: Get users from global ranking
-    users = collector.collect_users(target_count=100, method="global_ranking")
-    
-    # Method 2: Get detailed info for collected users
-    usernames = [user['username'] for user in users if user.get('username')]
-    detailed_users = collector.get_detailed_user_info(usernames[:50])  # Limit to 50 for API respect
+    seen = SeenIndex(args.seen) if args.seen else None
+    state = CrawlState(args.state) if args.state else None
+    basic_sink = detailed_sink = None
+    if args.jsonl:
+        suffix = ".jsonl.gz" if args.gzip else ".jsonl"
+        basic_sink = JsonlSink(f"leetcode_users_basic{suffix}", fsync_every=args.fsync_every)
+        detailed_sink = JsonlSink(f"leetcode_users_detailed{suffix}", fsync_every=args.fsync_every)
+
+    tally = UserTally(args.detailed)
+    if args.use_async:
+        users, detailed_users = asyncio.run(collect_async(args, seen, state, tally, basic_sink, detailed_sink))
+    else:
+        # Method 1: Get users from global ranking; only JSON output needs them all in memory
+        users = [] if basic_sink is None else None
+        for user in collector.iter_users(target_count=args.users, method=args.method, seen=seen, state=state,
+                                         sink=basic_sink):
+            tally.add(user)
+            if users is not None:
+                users.append(user)
+
+        # Method 2: Get detailed info for collected users
+        profiles = collector.iter_detailed_user_info(tally.usernames, seen=seen,
+                                                     batch_size=args.batch_size, state=state,
+                                                     sink=detailed_sink)  # Limit for API respect
+        if detailed_sink is None:
+            detailed_users = list(profiles)
+        else:
+            with StoreWriter("leetcode_users") as store:
+                for user in profiles:
+                    store.add(user)
     
     # Save the data
-    collector.save_to_json(users, "leetcode_users_basic.json")
-    collector.save_to_json(detailed_users, "leetcode_users_detailed.json")
+    if args.jsonl:
+        basic_sink.close()
+        detailed_sink.close()
+        print(f"Data streamed to {basic_sink.path} ({basic_sink.count} new) and {detailed_sink.path} ({detailed_sink.count} new)")
+    else:
+        fetched = detailed_users
+        if state is not None:
+            # Profiles finished by an earlier, interrupted run are only in the state
+            detailed_users = list(state.iter_profiles(tally.usernames))
+        # With a seen index this run only holds new users, so keep the ones saved before
+        collector.save_to_json(users, "leetcode_users_basic.json", merge=seen is not None)
+        collector.save_to_json(detailed_users, "leetcode_users_detailed.json", merge=seen is not None)
+        collector.save_to_store(fetched, "leetcode_users")
     
     # Print some statistics
-    print(f"\nCollected {len(users)} users")
-    countries = [user.get('profile', {}).get('country', 'Unknown') for user in users if user.get('profile')]
-    print(f"Top countries: {dict(sorted([(c, countries.count(c)) for c in set(countries)], key=lambda x: x[1], reverse=True)[:5])}")
\ No newline at end of file
+    print(f"\nCollected {tally.count} users")
+    print(f"Top countries: {tally.top_countries()}")
@@ -1,20 +1,19 @@
 # LeetCode ML Analysis System - Standalone Version
+# numpy, sklearn and requests are imported on first use, so importing this
+# module and running a heuristic analysis stays fast (see check_import_time.py)
+# For many users at once use batch_analyze.py, which is resumable
 import json
-import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, mean_squared_error
-from sklearn.cluster import KMeans
 from typing import List, Dict, Optional
 import re
-from datetime import datetime, timedelta
 import logging
-from dataclasses import dataclass
-import pickle
+import threading
+from dataclasses import dataclass, field
 import os
 
+from features import FeatureBuilder
+from model_artifacts import PEER_INDEX_PATH, ModelArtifacts
+from problem_catalog import LEVEL_DIFFICULTY, get_catalog, solved_problem_names
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,6 +28,8 @@ class LeetCodeUserData:
     skills: List[str]
     submissions: str
     streak: str
+    # Titles of recently accepted problems, skipped when suggesting problems
+    recentAccepted: List[str] = field(default_factory=list)
 
 @dataclass
 class AnalysisResult:
@@ -39,6 +40,7 @@ class AnalysisResult:
     recommendations: List[str]
     suggested_problems: List[Dict[str, str]]
     improvement_roadmap: List[str]
+    peer_group: Optional[int] = None
 
 @dataclass
 class ProcessedUserData:
@@ -55,14 +57,7 @@ class ProcessedUserData:
     advanced_topics_ratio: float
 
 class LeetCodeAnalyzer:
-    def __init__(self):
-        self.scaler = StandardScaler()
-        self.performance_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.proficiency_model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.kmeans_model = KMeans(n_clusters=5, random_state=42)
-        self.topic_encoder = LabelEncoder()
-        
-       
+    def __init__(self, models: Optional[ModelArtifacts] = None):
         self.topic_difficulty = {
             'Array': 1, 'String': 1, 'Hash Table': 2, 'Math': 1,
             'Two Pointers': 2, 'Binary Search': 3, 'Sorting': 2,
@@ -75,73 +70,35 @@ class LeetCodeAnalyzer:
             'Interactive': 4, 'Segment Tree': 5, 'Binary Indexed Tree': 5
         }
         
-        
-        self.problem_database = self._initialize_problem_database()
-        
-    def _initialize_problem_database(self):
-        """Initialize problem database with recommendations"""
-        return {
-    'Array': [
-        {'title': 'Two Sum', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/two-sum/'},
-        {'title': 'Best Time to Buy and Sell Stock', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/best-time-to-buy-and-sell-stock/'},
-        {'title': 'Maximum Subarray', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/maximum-subarray/'},
-        {'title': 'Contains Duplicate', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/contains-duplicate/'},
-        {'title': 'Product of Array Except Self', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/product-of-array-except-self/'},
-        {'title': 'Merge Intervals', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/merge-intervals/'},
-        {'title': 'Median of Two Sorted Arrays', 'difficulty': 'Hard', 'url': 'https://leetcode.com/problems/median-of-two-sorted-arrays/'}
-    ],
-    'Dynamic Programming': [
-        {'title': 'Climbing Stairs', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/climbing-stairs/'},
-        {'title': 'House Robber', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/house-robber/'},
-        {'title': 'Longest Increasing Subsequence', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/longest-increasing-subsequence/'},
-        {'title': 'Coin Change', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/coin-change/'},
-        {'title': 'Word Break', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/word-break/'},
-        {'title': 'Edit Distance', 'difficulty': 'Hard', 'url': 'https://leetcode.com/problems/edit-distance/'}
-    ],
-    'Binary Search': [
-        {'title': 'Binary Search', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/binary-search/'},
-        {'title': 'Search in Rotated Sorted Array', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/search-in-rotated-sorted-array/'},
-        {'title': 'Find Peak Element', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/find-peak-element/'},
-        {'title': 'Median of Two Sorted Arrays', 'difficulty': 'Hard', 'url': 'https://leetcode.com/problems/median-of-two-sorted-arrays/'},
-        {'title': 'Koko Eating Bananas', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/koko-eating-bananas/'}
-    ],
-    'String': [
-        {'title': 'Valid Anagram', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/valid-anagram/'},
-        {'title': 'Longest Substring Without Repeating Characters', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/longest-substring-without-repeating-characters/'},
-        {'title': 'Valid Palindrome', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/valid-palindrome/'},
-        {'title': 'Implement strStr()', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/implement-strstr/'},
-        {'title': 'Longest Palindromic Substring', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/longest-palindromic-substring/'}
-    ],
-    'Tree': [
-        {'title': 'Maximum Depth of Binary Tree', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/maximum-depth-of-binary-tree/'},
-        {'title': 'Validate Binary Search Tree', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/validate-binary-search-tree/'},
-        {'title': 'Binary Tree Inorder Traversal', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/binary-tree-inorder-traversal/'},
-        {'title': 'Lowest Common Ancestor of a Binary Tree', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/lowest-common-ancestor-of-a-binary-tree/'},
-        {'title': 'Binary Tree Maximum Path Sum', 'difficulty': 'Hard', 'url': 'https://leetcode.com/problems/binary-tree-maximum-path-sum/'}
-    ],
-    'Hash Table': [
-        {'title': 'Valid Anagram', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/valid-anagram/'},
-        {'title': 'Group Anagrams', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/group-anagrams/'},
-        {'title': 'Top K Frequent Elements', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/top-k-frequent-elements/'},
-        {'title': 'Two Sum', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/two-sum/'},
-        {'title': 'Longest Consecutive Sequence', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/longest-consecutive-sequence/'}
-    ],
-    'Math': [
-        {'title': 'Palindrome Number', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/palindrome-number/'},
-        {'title': 'Reverse Integer', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/reverse-integer/'},
-        {'title': 'Power of Two', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/power-of-two/'},
-        {'title': 'Fizz Buzz', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/fizz-buzz/'},
-        {'title': 'Count Primes', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/count-primes/'}
-    ],
-    'Graph': [
-        {'title': 'Number of Islands', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/number-of-islands/'},
-        {'title': 'Clone Graph', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/clone-graph/'},
-        {'title': 'Course Schedule', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/course-schedule/'},
-        {'title': 'Graph Valid Tree', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/graph-valid-tree/'},
-        {'title': 'Network Delay Time', 'difficulty': 'Medium', 'url': 'https://leetcode.com/problems/network-delay-time/'}
-    ]
-}
+        self.features = FeatureBuilder(self.topic_difficulty)
+        # Trained models are loaded on first use; without them the heuristics below are used
+        self.models = models or ModelArtifacts(self.features.feature_names)
+        self._peers = None
+        self._peers_loaded = False
+        self._peers_lock = threading.Lock()
+        
+    @property
+    def peers(self):
+        """Similar-users index loaded from PEER_INDEX_PATH on first use and saved back to it, or None"""
+        if not self._peers_loaded:
+            with self._peers_lock:
+                if not self._peers_loaded:
+                    if os.path.exists(PEER_INDEX_PATH):
+                        from peer_index import PeerIndex
+                        try:
+                            self._peers = PeerIndex.load(PEER_INDEX_PATH, self.topic_difficulty)
+                            # Users offered while analyzing would otherwise be lost on restart
+                            self._peers.autosave(PEER_INDEX_PATH)
+                            logger.info(f"Loaded peer index with {len(self._peers)} users")
+                        except ValueError as e:
+                            logger.warning(f"Ignoring peer index: {e}")
+                    self._peers_loaded = True
+        return self._peers
 
+    @peers.setter
+    def peers(self, index) -> None:
+        self._peers = index
+        self._peers_loaded = True
 
     def parse_user_data(self, data: LeetCodeUserData) -> ProcessedUserData:
         """Parse and process raw user data"""
@@ -194,6 +151,14 @@ class LeetCodeAnalyzer:
 
     def calculate_performance_score(self, processed_data: ProcessedUserData) -> float:
         """Calculate overall performance score (0-100)"""
+        model = self.models.get("score")
+        if model is not None:
+            predicted = float(model.predict(self.features.transform_one(processed_data))[0])
+            return min(max(predicted, 0.0), 100.0)
+        return self.heuristic_performance_score(processed_data)
+
+    def heuristic_performance_score(self, processed_data: ProcessedUserData) -> float:
+        """Rule-based performance score used when no trained model is available"""
         solve_ratio_score = min(processed_data.solve_ratio * 100 * 0.5, 50) 
         activity_score = min(processed_data.active_days * 0.5, 20) 
         diversity_score = processed_data.topic_diversity * 15 
@@ -230,7 +195,22 @@ class LeetCodeAnalyzer:
         
         return weak_areas[:5]
 
-    def generate_recommendations(self, processed_data: ProcessedUserData, weak_areas: List[str]) -> List[str]:
+    def peer_focus_topics(self, username: str, performance_score: float,
+                          topic_proficiency: Dict[str, float]) -> List[str]:
+        """Topics where similar, higher-scoring users are clearly stronger; queues this user for the index"""
+        peers = self.peers
+        if peers is None:
+            return []
+        vector = peers.vector(topic_proficiency)
+        stronger = [
+            peer for peer in peers.query(vector, k=10, exclude=username)
+            if peer.performance_score > performance_score
+        ]
+        peers.offer(username, vector, performance_score)
+        return peers.stronger_topics(vector, stronger)
+
+    def generate_recommendations(self, processed_data: ProcessedUserData, weak_areas: List[str],
+                                 peer_topics: Optional[List[str]] = None) -> List[str]:
         """Generate personalized recommendations"""
         recommendations = []
         
@@ -262,6 +242,9 @@ class LeetCodeAnalyzer:
                 else:
                     recommendations.append(f"💪 Strengthen {area} skills - practice with pattern recognition and common techniques")
         
+        if peer_topics:
+            recommendations.append(f"👥 Users with similar profiles who score higher are stronger in {', '.join(peer_topics)} - closing that gap is your fastest route up")
+        
    
         if processed_data.solve_ratio < 0.02:
             recommendations.append("🌱 Start with Easy problems to build confidence and learn fundamental patterns")
@@ -278,37 +261,41 @@ class LeetCodeAnalyzer:
         
         return recommendations
 
-    def suggest_problems(self, weak_areas: List[str]) -> List[Dict[str, str]]:
-        """Suggest specific problems based on weak areas"""
-        suggested = []
-        
-        for area in weak_areas[:3]:  
-            if area in self.problem_database:
-                problems = self.problem_database[area][:3]  
-                suggested.extend(problems)
-        
-        
-        if len(suggested) < 5:
-            general_problems = [
-                {'title': 'Two Sum', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/two-sum/'},
-                {'title': 'Valid Parentheses', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/valid-parentheses/'},
-                {'title': 'Merge Two Sorted Lists', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/merge-two-sorted-lists/'}
-            ]
-            suggested.extend(general_problems)
-        
-        return suggested[:8]  
+    def suggest_problems(self, weak_areas: List[str], solved: Optional[List[str]] = None,
+                         peer_topics: Optional[List[str]] = None, level: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Suggest ranked, deduplicated catalog problems for the weakest areas and
+        peer gaps, skipping solved ones and preferring the difficulty that suits the level
+        """
+        topics = weak_areas[:3] + [topic for topic in peer_topics or [] if topic not in weak_areas[:3]]
+        return get_catalog().suggest(topics, per_topic=3, min_count=5, limit=8, solved=solved or (),
+                                     difficulty=LEVEL_DIFFICULTY.get(level))
 
-    def create_improvement_roadmap(self, processed_data: ProcessedUserData, weak_areas: List[str]) -> List[str]:
+    def performance_level(self, processed_data: ProcessedUserData) -> str:
+        """Beginner, Intermediate or Advanced, from the trained classifier when available"""
+        model = self.models.get("level")
+        if model is not None:
+            return str(model.predict(self.features.transform_one(processed_data))[0])
+        if processed_data.solve_ratio < 0.02:
+            return "Beginner"
+        elif processed_data.solve_ratio < 0.08:
+            return "Intermediate"
+        return "Advanced"
+
+    def peer_group(self, processed_data: ProcessedUserData) -> Optional[int]:
+        """Cluster of similar users, or None without a trained clustering model"""
+        model = self.models.get("clusters")
+        if model is None:
+            return None
+        return int(model.predict(self.features.transform_one(processed_data))[0])
+
+    def create_improvement_roadmap(self, processed_data: ProcessedUserData, weak_areas: List[str],
+                                   level: Optional[str] = None) -> List[str]:
         """Create a structured improvement roadmap"""
         roadmap = []
         
         
-        if processed_data.solve_ratio < 0.02:
-            level = "Beginner"
-        elif processed_data.solve_ratio < 0.08:
-            level = "Intermediate"
-        else:
-            level = "Advanced"
+        level = level or self.performance_level(processed_data)
         
        
         if level == "Beginner":
@@ -357,11 +344,13 @@ class LeetCodeAnalyzer:
             performance_score = self.calculate_performance_score(processed_data)
             topic_proficiency = self.calculate_topic_proficiency(processed_data)
             weak_areas = self.identify_weak_areas(topic_proficiency)
+            peer_topics = self.peer_focus_topics(data.username, performance_score, topic_proficiency)
             
         
-            recommendations = self.generate_recommendations(processed_data, weak_areas)
-            suggested_problems = self.suggest_problems(weak_areas)
-            improvement_roadmap = self.create_improvement_roadmap(processed_data, weak_areas)
+            recommendations = self.generate_recommendations(processed_data, weak_areas, peer_topics)
+            level = self.performance_level(processed_data)
+            suggested_problems = self.suggest_problems(weak_areas, data.recentAccepted, peer_topics, level)
+            improvement_roadmap = self.create_improvement_roadmap(processed_data, weak_areas, level)
             
             return AnalysisResult(
                 username=data.username,
@@ -370,7 +359,8 @@ class LeetCodeAnalyzer:
                 weak_areas=weak_areas,
                 recommendations=recommendations,
                 suggested_problems=suggested_problems,
-                improvement_roadmap=improvement_roadmap
+                improvement_roadmap=improvement_roadmap,
+                peer_group=self.peer_group(processed_data)
             )
         
         except Exception as e:
@@ -378,13 +368,6 @@ class LeetCodeAnalyzer:
             raise Exception(f"Analysis failed: {e}")
 
 
-
-import requests
-import json
-import re
-from typing import Optional
-
-
 def clean_api_data(raw_data: str) -> str:
     """
     Clean data from API by removing newlines and extra text
@@ -440,61 +423,53 @@ def parse_streak(streak_str: str) -> str:
         return f"Total active days:{match.group(0)}"
     return cleaned
 
+def to_user_data(user_data: Dict) -> LeetCodeUserData:
+    """
+    Build a cleaned LeetCodeUserData from a raw profile payload
+    """
+    return LeetCodeUserData(
+        username=user_data.get("username", ""),
+        rank=clean_api_data(user_data.get("rank", "")),
+        totalQuestions=parse_total_questions(user_data.get("totalQuestions", "")),
+        languages=user_data.get("languages", []),
+        skills=user_data.get("skills", []),
+        submissions=parse_submissions(user_data.get("submissions", "")),
+        streak=parse_streak(user_data.get("streak", "")),
+        recentAccepted=solved_problem_names(user_data)
+    )
+
 def fetch_user_from_api(username: str) -> Optional[LeetCodeUserData]:
     """
     Fetch user data from the backend API with proper data cleaning
     """
+    # Pooled session with retries; see upstream_client.py for bulk fetch_many
+    from upstream_client import get_client
+
     try:
-        url = f"http://localhost:3003/leetcode/{username}"
-        print(f"🌐 Fetching data from API: {url}")
-        
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        client = get_client()
+        print(f"🌐 Fetching data from API: {client.url.format(username=username)}")
         
-        api_data = response.json()
-        
-        if not api_data.get("status"):
-            print(f"❌ API returned error: {api_data.get('message', 'Unknown error')}")
+        user_data = client.fetch_raw(username)
+        if user_data is None:
+            print(f"❌ Could not fetch data for user: {username}")
             return None
         
        
-        user_data = api_data["data"]["data"]
-        
-       
-        cleaned_rank = clean_api_data(user_data.get("rank", ""))
-        cleaned_total_questions = parse_total_questions(user_data.get("totalQuestions", ""))
-        cleaned_submissions = parse_submissions(user_data.get("submissions", ""))
-        cleaned_streak = parse_streak(user_data.get("streak", ""))
+        leetcode_user = to_user_data(user_data)
         
        
         print(f"🔍 Debug - Raw totalQuestions: '{user_data.get('totalQuestions', '')}'")
-        print(f"Rank - {cleaned_rank}")
-        print(f"Total Submissions - {cleaned_submissions} this year")
-        print(f"🔍 Debug - Cleaned totalQuestions: '{cleaned_total_questions}'")
+        print(f"Rank - {leetcode_user.rank}")
+        print(f"Total Submissions - {leetcode_user.submissions} this year")
+        print(f"🔍 Debug - Cleaned totalQuestions: '{leetcode_user.totalQuestions}'")
         print(f"🔍 Debug - Raw streak: '{user_data.get('streak', '')}'")
-        print(f"🔍 Debug - Cleaned streak: '{cleaned_streak}'")
+        print(f"🔍 Debug - Cleaned streak: '{leetcode_user.streak}'")
         print(f"Easy - {user_data.get('questions','')[0]}\nMedium - {user_data.get('questions','')[1]}\nHard -{user_data.get('questions','')[2]}")
         
         
-        leetcode_user = LeetCodeUserData(
-            username=user_data.get("username", ""),
-            rank=cleaned_rank,
-            totalQuestions=cleaned_total_questions,
-            languages=user_data.get("languages", []),
-            skills=user_data.get("skills", []),
-            submissions=cleaned_submissions,
-            streak=cleaned_streak
-        )
-        
         print(f"✅ Successfully fetched and cleaned data for user: {user_data.get('username', 'Unknown')}")
         return leetcode_user
         
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Network error: {e}")
-        return None
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON parsing error: {e}")
-        return None
     except KeyError as e:
         print(f"❌ Missing expected field in API response: {e}")
         return None
@@ -502,11 +477,34 @@ def fetch_user_from_api(username: str) -> Optional[LeetCodeUserData]:
         print(f"❌ Unexpected error: {e}")
         return None
 
-analyzer = LeetCodeAnalyzer()
+_analyzer: Optional[LeetCodeAnalyzer] = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer() -> LeetCodeAnalyzer:
+    """The shared analyzer, built on first use"""
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = LeetCodeAnalyzer()
+    return _analyzer
+
+
+def __getattr__(name: str):
+    # Keeps `from model2 import analyzer` working without building it at import time
+    if name == "analyzer":
+        return get_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__=="__main__" :
     username=input("Enter your name :")
     userdata=fetch_user_from_api(username)
-    result =analyzer.analyze_user(userdata)
+    if userdata is None:
+        # fetch_user_from_api has already printed why
+        raise SystemExit(1)
+    result =get_analyzer().analyze_user(userdata)
     result_dict = {
             "username": result.username,
             "performance_score": result.performance_score,
@@ -514,5 +512,6 @@ if __name__=="__main__" :
             "weak_areas": result.weak_areas,
             "recommendations": result.recommendations,
             "suggested_problems": result.suggested_problems,
-            "improvement_roadmap": result.improvement_roadmap
+            "improvement_roadmap": result.improvement_roadmap,
+            "peer_group": result.peer_group
     }
\ No newline at end of file
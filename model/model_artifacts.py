@@ -0,0 +1,152 @@
+"""
+Versioned model artifacts for model2's LeetCodeAnalyzer.
+
+train_models.py writes one directory per training run:
+
+    artifacts/<version>/metadata.json     feature schema, labels and evaluation metrics
+    artifacts/<version>/level.pkl         RandomForestClassifier -> Beginner/Intermediate/Advanced
+    artifacts/<version>/score.pkl         RandomForestRegressor -> performance score (0-100)
+    artifacts/<version>/clusters.pkl      StandardScaler + KMeans pipeline -> peer group
+
+ModelArtifacts picks the newest version whose feature schema and
+ARTIFACT_FORMAT match this code (or exactly MODEL2_VERSION) and unpickles
+each model the first time it is asked for. Random forests are compiled into flat-array evaluators
+(tree_eval.py) on load, since per-request predictions are single rows.
+Missing or incompatible artifacts make get() return None, and the analyzer
+falls back to its heuristics. Artifacts are pickles: only load
+ones you trained yourself.
+"""
+import json
+import logging
+import os
+import pickle
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from features import FEATURE_SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_ROOT = os.environ.get(
+    "MODEL2_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts"),
+)
+PEER_INDEX_PATH = os.environ.get("PEER_INDEX_PATH", os.path.join(ARTIFACT_ROOT, "peer_index.npz"))
+MODEL_NAMES = ("level", "score", "clusters")
+# Version 1 named the level classifier "performance" and the score regressor "proficiency"
+ARTIFACT_FORMAT = 2
+METADATA_FILE = "metadata.json"
+
+
+def new_version() -> str:
+    """Sortable UTC timestamp used as the artifact version"""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def write_artifacts(models: Dict[str, Any], metadata: Dict[str, Any], feature_names: List[str],
+                    root: str = ARTIFACT_ROOT, version: Optional[str] = None) -> str:
+    """Save fitted models and their metadata as a new version directory"""
+    version = version or new_version()
+    path = os.path.join(root, version)
+    os.makedirs(path, exist_ok=False)
+    for name, model in models.items():
+        with open(os.path.join(path, f"{name}.pkl"), 'wb') as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+    metadata = dict(
+        metadata,
+        version=version,
+        artifact_format=ARTIFACT_FORMAT,
+        created_at=datetime.now(timezone.utc).isoformat(),
+        feature_schema={"version": FEATURE_SCHEMA_VERSION, "features": feature_names},
+        models=sorted(models),
+    )
+    # Written last, so a version directory without metadata is never picked up half-written
+    with open(os.path.join(path, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    return path
+
+
+class ModelArtifacts:
+    """Lazily loaded models of one artifact version, shared by every analysis"""
+
+    def __init__(self, feature_names: List[str], root: str = ARTIFACT_ROOT, version: Optional[str] = None):
+        self.feature_names = feature_names
+        self.root = root
+        self.version = version or os.environ.get("MODEL2_VERSION")
+        self._metadata: Optional[Dict[str, Any]] = None
+        self._models: Dict[str, Any] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def versions(self) -> List[str]:
+        """Version directories with metadata, newest first"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            (name for name in os.listdir(self.root) if os.path.isfile(os.path.join(self.root, name, METADATA_FILE))),
+            reverse=True,
+        )
+
+    def read_metadata(self, version: str) -> Optional[Dict[str, Any]]:
+        """Metadata of one version, or None if it is unreadable or built for other features"""
+        try:
+            with open(os.path.join(self.root, version, METADATA_FILE), 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read model artifact {version}: {e}")
+            return None
+        if metadata.get("artifact_format", 1) != ARTIFACT_FORMAT:
+            logger.warning(f"Model artifact {version} has artifact format {metadata.get('artifact_format', 1)}, expected {ARTIFACT_FORMAT}; skipping it")
+            return None
+        schema = metadata.get("feature_schema", {})
+        if schema.get("version") != FEATURE_SCHEMA_VERSION or schema.get("features") != self.feature_names:
+            logger.warning(f"Model artifact {version} has an incompatible feature schema, skipping it")
+            return None
+        return metadata
+
+    def _load_metadata(self) -> Optional[Dict[str, Any]]:
+        # A pinned version is used or rejected as is; otherwise the newest compatible one wins
+        for version in ([self.version] if self.version else self.versions()):
+            metadata = self.read_metadata(version)
+            if metadata is not None:
+                self.version = version
+                return metadata
+        logger.info("No compatible model artifacts found, using heuristic analysis")
+        return None
+
+    @property
+    def metadata(self) -> Optional[Dict[str, Any]]:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._metadata = self._load_metadata()
+                    self._loaded = True
+        return self._metadata
+
+    def get(self, name: str) -> Optional[Any]:
+        """The fitted model, unpickled on first use, or None when unavailable"""
+        if name in self._models:
+            return self._models[name]
+        metadata = self.metadata
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._load_model(name) if metadata and name in metadata["models"] else None
+        return self._models[name]
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, self.version, f"{name}.pkl")
+
+    def _load_model(self, name: str) -> Optional[Any]:
+        # Deferred with the unpickling itself, which is what pulls in numpy and sklearn
+        from tree_eval import compile_model
+
+        path = self.path(name)
+        try:
+            with open(path, 'rb') as f:
+                model = compile_model(pickle.load(f))
+        except Exception as e:
+            logger.warning(f"Could not load model {path}: {e}")
+            return None
+        logger.info(f"Loaded {name} model from artifact {self.version}")
+        return model
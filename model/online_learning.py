@@ -0,0 +1,199 @@
+"""
+Incremental training for model2's models.
+
+OnlineTrainer keeps a running mean/variance StandardScaler, a MiniBatchKMeans
+for peer groups, an SGDRegressor for the performance score and an
+SGDClassifier for the level, all updated with partial_fit. Each batch of
+newly collected profiles costs the same no matter how many users were seen
+before. Every --checkpoint-every batches the current state is written as a
+regular artifact version (see model_artifacts.py), which the analyzer picks
+up like a batch-trained one. The version also carries the raw online state,
+so a later run resumes where the last checkpoint stopped.
+
+    python online_learning.py new_profiles.jsonl --batch-size 256
+    python online_learning.py more_profiles.jsonl --resume
+"""
+import argparse
+import copy
+import logging
+import shutil
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.linear_model import SGDClassifier, SGDRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from model2 import LeetCodeAnalyzer, ProcessedUserData
+from model_artifacts import ARTIFACT_ROOT, ModelArtifacts, new_version, write_artifacts
+from train_models import LEVELS, load_profiles, process_profiles, rank_levels, rank_scores, ranked_mask
+
+logger = logging.getLogger(__name__)
+
+ONLINE_STATE = "online_state"
+
+
+class OnlineTrainer:
+    def __init__(self, features, n_clusters: int = 5, seed: int = 42):
+        self.features = features
+        self.n_clusters = n_clusters
+        self.scaler = StandardScaler()
+        self.clusters = MiniBatchKMeans(n_clusters=n_clusters, random_state=seed, n_init=3)
+        self.score = SGDRegressor(random_state=seed)
+        self.level = SGDClassifier(loss="log_loss", random_state=seed)
+        self.samples_seen = 0
+        self.ranked_seen = 0
+        self.batches = 0
+        # MiniBatchKMeans needs n_clusters samples before its first update
+        self._pending: Optional[np.ndarray] = None
+
+    def partial_fit(self, users: List[ProcessedUserData]) -> None:
+        """Update every model with one batch of users"""
+        if not users:
+            return
+        X = self.features.transform(users)
+        self.scaler.partial_fit(X)
+        X_scaled = self.scaler.transform(X)
+
+        if self._pending is not None:
+            X_cluster = np.vstack([self._pending, X_scaled])
+        else:
+            X_cluster = X_scaled
+        if hasattr(self.clusters, "cluster_centers_") or len(X_cluster) >= self.n_clusters:
+            self.clusters.partial_fit(X_cluster)
+            self._pending = None
+        else:
+            self._pending = X_cluster
+
+        ranked = ranked_mask(users)
+        if ranked.any():
+            ranks = np.array([user.rank_numeric for user in users])[ranked]
+            self.score.partial_fit(X_scaled[ranked], rank_scores(ranks))
+            self.level.partial_fit(X_scaled[ranked], rank_levels(ranks), classes=LEVELS)
+
+        self.samples_seen += len(users)
+        self.ranked_seen += int(ranked.sum())
+        self.batches += 1
+
+    @property
+    def ready(self) -> bool:
+        return hasattr(self.clusters, "cluster_centers_") and self.ranked_seen > 0
+
+    def snapshot(self) -> Dict[str, object]:
+        """Inference pipelines over a frozen copy of the current state"""
+        scaler = copy.deepcopy(self.scaler)
+        return {
+            "level": make_pipeline(scaler, copy.deepcopy(self.level)),
+            "score": make_pipeline(scaler, copy.deepcopy(self.score)),
+            "clusters": make_pipeline(scaler, copy.deepcopy(self.clusters)),
+            ONLINE_STATE: self.state(),
+        }
+
+    def state(self) -> Dict[str, object]:
+        """Everything needed to continue training, as plain sklearn objects and counters"""
+        return {
+            "n_clusters": self.n_clusters,
+            "scaler": self.scaler,
+            "clusters": self.clusters,
+            "score": self.score,
+            "level": self.level,
+            "samples_seen": self.samples_seen,
+            "ranked_seen": self.ranked_seen,
+            "batches": self.batches,
+            "pending": self._pending,
+        }
+
+    @classmethod
+    def from_state(cls, features, state: Dict[str, object]) -> "OnlineTrainer":
+        trainer = cls(features, state["n_clusters"])
+        trainer.scaler = state["scaler"]
+        trainer.clusters = state["clusters"]
+        trainer.score = state["score"]
+        trainer.level = state["level"]
+        trainer.samples_seen = state["samples_seen"]
+        trainer.ranked_seen = state["ranked_seen"]
+        trainer.batches = state["batches"]
+        trainer._pending = state["pending"]
+        return trainer
+
+    def checkpoint(self, root: str = ARTIFACT_ROOT) -> str:
+        metadata = {
+            "mode": "online",
+            "params": {"clusters": self.n_clusters},
+            "metrics": {"users": self.samples_seen, "ranked_users": self.ranked_seen, "batches": self.batches},
+        }
+        # The batch count keeps checkpoints written within the same second distinct and ordered
+        version = f"{new_version()}-{self.batches:08d}"
+        return write_artifacts(self.snapshot(), metadata, self.features.feature_names, root, version)
+
+    @classmethod
+    def resume(cls, features, root: str = ARTIFACT_ROOT) -> Optional["OnlineTrainer"]:
+        """
+        The online state of the newest compatible online checkpoint, if any.
+        Newer batch-trained versions are skipped rather than ending the search.
+        """
+        for version in ModelArtifacts(features.feature_names, root).versions():
+            artifacts = ModelArtifacts(features.feature_names, root, version)
+            metadata = artifacts.metadata
+            if not metadata or metadata.get("mode") != "online" or ONLINE_STATE not in metadata["models"]:
+                continue
+            state = artifacts.get(ONLINE_STATE)
+            if state is not None:
+                return cls.from_state(features, state)
+        return None
+
+
+def batches(profiles: List[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    for start in range(0, len(profiles), batch_size):
+        yield profiles[start:start + batch_size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally update model2's models with new profiles")
+    parser.add_argument("profiles", nargs="+", help="scraper or collector profiles: JSON lists, JSONL(.gz) or UserStore directories")
+    parser.add_argument("-o", "--output-dir", default=ARTIFACT_ROOT)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--checkpoint-every", type=int, default=20, help="batches between checkpoints")
+    parser.add_argument("--keep", type=int, default=5, help="online checkpoints to keep from this run")
+    parser.add_argument("--clusters", type=int, default=5)
+    parser.add_argument("--resume", action="store_true", help="continue from the newest online checkpoint")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    analyzer = LeetCodeAnalyzer()
+    trainer = OnlineTrainer.resume(analyzer.features, args.output_dir) if args.resume else None
+    if trainer is None:
+        if args.resume:
+            print("🔍 No online checkpoint found, starting fresh")
+        trainer = OnlineTrainer(analyzer.features, args.clusters, args.seed)
+    else:
+        print(f"✅ Resumed after {trainer.samples_seen} users ({trainer.batches} batches)")
+
+    written = deque()
+
+    def checkpoint():
+        if not trainer.ready:
+            return
+        written.append(trainer.checkpoint(args.output_dir))
+        while len(written) > args.keep:
+            shutil.rmtree(written.popleft(), ignore_errors=True)
+
+    last_checkpoint = trainer.batches
+    for path in args.profiles:
+        for batch in batches(load_profiles(path), args.batch_size):
+            trainer.partial_fit(process_profiles(analyzer, batch))
+            if trainer.batches - last_checkpoint >= args.checkpoint_every:
+                checkpoint()
+                last_checkpoint = trainer.batches
+    if trainer.batches != last_checkpoint:
+        checkpoint()
+
+    print(f"✅ Models updated with {trainer.samples_seen} users ({trainer.ranked_seen} ranked) in {trainer.batches} batches")
+    if written:
+        print(f"   Latest checkpoint: {written[-1]}")
+
+
+if __name__ == "__main__":
+    main()
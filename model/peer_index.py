@@ -0,0 +1,257 @@
+"""
+Nearest-neighbour index of users' topic-proficiency vectors.
+
+Rows up to the last rebuild live in a KDTree. Rows inserted since then sit
+in a buffer of at most max_buffer rows that is scanned brute force, so a
+query costs one tree lookup plus a fixed-size scan however large the index
+grows. The replacement tree is built outside the lock queries take, and
+offer() queues an insert for a background thread, so neither inserts nor
+rebuilds run on a caller's request path. Re-inserting a username replaces
+its previous row.
+
+Build an index from collected profiles; model2's analyzer loads it from
+PEER_INDEX_PATH when present, offers every user it analyzes, and through
+autosave() writes the grown index back every 1000 inserts and at exit:
+
+    python peer_index.py build profiles.json
+"""
+import argparse
+import atexit
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from model_artifacts import PEER_INDEX_PATH
+
+
+@dataclass
+class Peer:
+    username: str
+    distance: float
+    performance_score: float
+    vector: np.ndarray
+
+
+class PeerIndex:
+    def __init__(self, topics: Sequence[str], max_buffer: int = 256, leaf_size: int = 40,
+                 max_pending: int = 10000):
+        self.topics = list(topics)
+        self.max_buffer = max_buffer
+        self.leaf_size = leaf_size
+        self._vectors = np.zeros((1024, len(self.topics)), dtype=np.float32)
+        self._scores = np.zeros(1024, dtype=np.float32)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._usernames: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._tree: Optional[KDTree] = None
+        self._indexed = 0   # rows [0, _indexed) are in the tree
+        self._stale = 0     # replaced rows still in the tree
+        self._lock = threading.Lock()        # held by queries and by swaps of the arrays they read
+        self._write_lock = threading.Lock()  # serializes inserts and rebuilds
+        # Offered inserts waiting for the background thread; the oldest are dropped if it falls behind
+        self._pending = deque(maxlen=max_pending)
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._unsaved = 0   # rows added since the last load or save
+        self._save_path: Optional[str] = None
+        self._save_every = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def vector(self, proficiency: Dict[str, float]) -> np.ndarray:
+        """Fixed-order vector for a topic -> proficiency dict; unknown topics are ignored"""
+        return np.array([proficiency.get(topic, 0.0) for topic in self.topics], dtype=np.float32)
+
+    def stronger_topics(self, vector: np.ndarray, peers: List[Peer], min_gap: float = 0.2,
+                        limit: int = 3) -> List[str]:
+        """Topics where the given peers are on average clearly more proficient, biggest gap first"""
+        if not peers:
+            return []
+        gaps = np.mean([peer.vector for peer in peers], axis=0) - vector
+        order = np.argsort(-gaps, kind='stable')[:limit]
+        return [self.topics[i] for i in order if gaps[i] >= min_gap]
+
+    def add(self, username: str, vector: np.ndarray, performance_score: float) -> None:
+        with self._write_lock:
+            with self._lock:
+                self._append(username, vector, performance_score)
+            self._unsaved += 1
+            if len(self._usernames) - self._indexed >= self.max_buffer:
+                self._rebuild()
+
+    def offer(self, username: str, vector: np.ndarray, performance_score: float) -> None:
+        """Queue an insert for the background thread; returns immediately"""
+        self._pending.append((username, np.array(vector, dtype=np.float32), performance_score))
+        if self._worker is None:
+            with self._write_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._drain_forever, name="peer-index", daemon=True)
+                    self._worker.start()
+        self._wakeup.set()
+
+    def _drain_forever(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self._drain()
+            if self._save_path is not None and self._unsaved >= self._save_every:
+                self.save(self._save_path)
+
+    def _drain(self) -> None:
+        while self._pending:
+            try:
+                username, vector, score = self._pending.popleft()
+            except IndexError:
+                return
+            self.add(username, vector, score)
+
+    def autosave(self, path: str, every: int = 1000) -> None:
+        """Save to path from the background thread every `every` inserts, and at interpreter exit"""
+        self._save_path = path
+        self._save_every = every
+        atexit.register(self._save_if_changed)
+
+    def _save_if_changed(self) -> None:
+        self._drain()
+        if self._unsaved:
+            self.save(self._save_path)
+
+    def _append(self, username: str, vector: np.ndarray, performance_score: float) -> None:
+        previous = self._rows.get(username)
+        if previous is not None:
+            self._alive[previous] = False
+            if previous < self._indexed:
+                self._stale += 1
+        row = len(self._usernames)
+        if row == len(self._scores):
+            capacity = 2 * row
+            self._vectors = np.resize(self._vectors, (capacity, len(self.topics)))
+            self._scores = np.resize(self._scores, capacity)
+            self._alive = np.concatenate([self._alive[:row], np.zeros(capacity - row, dtype=bool)])
+        self._vectors[row] = vector
+        self._scores[row] = performance_score
+        self._alive[row] = True
+        self._usernames.append(username)
+        self._rows[username] = row
+
+    def _rebuild(self) -> None:
+        """Compact away replaced rows and index everything in a fresh tree; needs _write_lock"""
+        live = np.flatnonzero(self._alive[:len(self._usernames)])
+        count = len(live)
+        capacity = max(1024, 2 * count)
+        vectors = np.zeros((capacity, len(self.topics)), dtype=np.float32)
+        scores = np.zeros(capacity, dtype=np.float32)
+        alive = np.zeros(capacity, dtype=bool)
+        vectors[:count] = self._vectors[live]
+        scores[:count] = self._scores[live]
+        alive[:count] = True
+        usernames = [self._usernames[row] for row in live]
+        # Queries keep using the old tree and buffer while the new tree is built
+        tree = KDTree(vectors[:count], leaf_size=self.leaf_size) if count else None
+        with self._lock:
+            self._vectors, self._scores, self._alive = vectors, scores, alive
+            self._usernames = usernames
+            self._rows = {username: row for row, username in enumerate(usernames)}
+            self._tree = tree
+            self._indexed = count
+            self._stale = 0
+
+    def query(self, vector: np.ndarray, k: int = 10, exclude: Optional[str] = None) -> List[Peer]:
+        """The k nearest users by Euclidean distance, closest first"""
+        with self._lock:
+            vector = np.asarray(vector, dtype=np.float32)
+            skip = self._rows.get(exclude) if exclude is not None else None
+            rows: List[np.ndarray] = []
+            distances: List[np.ndarray] = []
+
+            if self._tree is not None:
+                # Ask for extra neighbours to cover replaced rows and the excluded user
+                wanted = min(k + self._stale + 1, self._indexed)
+                tree_distances, tree_rows = self._tree.query(vector[None, :], k=wanted)
+                rows.append(tree_rows[0])
+                distances.append(tree_distances[0])
+
+            buffered = len(self._usernames) - self._indexed
+            if buffered:
+                buffer = self._vectors[self._indexed:len(self._usernames)]
+                rows.append(np.arange(self._indexed, len(self._usernames)))
+                distances.append(np.sqrt(((buffer - vector) ** 2).sum(axis=1)))
+
+            if not rows:
+                return []
+            rows = np.concatenate(rows)
+            distances = np.concatenate(distances)
+            keep = self._alive[rows]
+            if skip is not None:
+                keep &= rows != skip
+            rows, distances = rows[keep], distances[keep]
+            order = np.argsort(distances, kind='stable')[:k]
+            return [
+                Peer(self._usernames[row], float(distances[i]), float(self._scores[row]), self._vectors[row].copy())
+                for i, row in ((i, rows[i]) for i in order)
+            ]
+
+    def save(self, path: str) -> None:
+        self._drain()
+        with self._write_lock:
+            self._rebuild()
+            count = self._indexed
+            # Write then rename, so a reader or a crash never sees a partial index
+            with open(path + ".tmp", 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    topics=np.array(self.topics),
+                    usernames=np.array(self._usernames),
+                    vectors=self._vectors[:count],
+                    scores=self._scores[:count],
+                )
+            os.replace(path + ".tmp", path)
+            self._unsaved = 0
+
+    @classmethod
+    def load(cls, path: str, topics: Sequence[str]) -> "PeerIndex":
+        """Load a saved index, checking that it was built for the same topics"""
+        with np.load(path) as data:
+            if list(data["topics"]) != list(topics):
+                raise ValueError(f"Peer index {path} was built for a different topic list")
+            index = cls(topics)
+            for username, vector, score in zip(data["usernames"], data["vectors"], data["scores"]):
+                index._append(str(username), vector, float(score))
+        with index._write_lock:
+            index._rebuild()
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the similar-users index for model2")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="index collected raw profiles")
+    build.add_argument("profiles", help="scraper or collector profiles: JSON list, JSONL(.gz) or UserStore directory")
+    build.add_argument("-o", "--output", default=PEER_INDEX_PATH)
+    args = parser.parse_args()
+
+    from model2 import LeetCodeAnalyzer, to_user_data
+    from train_models import load_profiles
+
+    analyzer = LeetCodeAnalyzer()
+    index = PeerIndex(analyzer.topic_difficulty)
+    for profile in load_profiles(args.profiles):
+        try:
+            processed = analyzer.parse_user_data(to_user_data(profile))
+        except ValueError:
+            continue
+        proficiency = analyzer.calculate_topic_proficiency(processed)
+        index.add(processed.username, index.vector(proficiency), analyzer.calculate_performance_score(processed))
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    index.save(args.output)
+    print(f"✅ Indexed {len(index)} users into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
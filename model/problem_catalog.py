@@ -0,0 +1,223 @@
+"""
+Indexed, file-backed problem catalog used for problem suggestions.
+
+The on-disk format (problem_catalog.json) is compact and comes with its
+indexes prebuilt, so loading it is a single json.load:
+
+    {
+      "version": 1,
+      "topics": ["Array", ...],
+      "difficulties": ["Easy", "Medium", "Hard"],
+      "problems": [[slug, title, difficulty_index, [topic_index, ...]], ...],
+      "by_topic": [[problem_id, ...], ...],        # per topic, by difficulty then best first
+      "featured": [problem_id, ...]                # general fallback picks
+    }
+
+Build a catalog from a list of {title, slug or url, difficulty, topics,
+popularity} records with:
+
+    python problem_catalog.py build source.json -o problem_catalog.json
+"""
+import argparse
+import bisect
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+CATALOG_PATH = os.environ.get(
+    "PROBLEM_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "problem_catalog.json"),
+)
+CATALOG_VERSION = 1
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+# Difficulty suggested first for each analyzer performance level
+LEVEL_DIFFICULTY = {"Beginner": "Easy", "Intermediate": "Medium", "Advanced": "Hard"}
+PROBLEM_URL = "https://leetcode.com/problems/{slug}/"
+
+_NON_SLUG = re.compile(r'[^a-z0-9]+')
+_URL_SLUG = re.compile(r'/problems/([^/?#]+)')
+
+
+def slugify(name: str) -> str:
+    """Problem slug from a slug, a title or a problem URL"""
+    match = _URL_SLUG.search(name)
+    if match:
+        return match.group(1).lower()
+    return _NON_SLUG.sub('-', name.lower()).strip('-')
+
+
+def solved_problem_names(raw_user_data: Dict) -> List[str]:
+    """
+    Titles of problems an upstream profile shows as solved. Only its recent
+    accepted submissions name problems; solvedProblems holds per-difficulty
+    counts, so older solves cannot be skipped.
+    """
+    submissions = raw_user_data.get("recentSubmissions") or []
+    return [entry["title"] for entry in submissions if isinstance(entry, dict) and entry.get("title")]
+
+
+class ProblemCatalog:
+    def __init__(self, data: Dict):
+        if data.get("version") != CATALOG_VERSION:
+            raise ValueError(f"Unsupported problem catalog version: {data.get('version')}")
+        self.topics: List[str] = data["topics"]
+        self.difficulties: List[str] = data["difficulties"]
+        self.problems: List[list] = data["problems"]
+        self.by_topic: List[List[int]] = data["by_topic"]
+        self.featured: List[int] = data["featured"]
+        self.topic_index = {topic: i for i, topic in enumerate(self.topics)}
+        self.slug_index = {problem[0]: i for i, problem in enumerate(self.problems)}
+
+    @classmethod
+    def load(cls, path: str = CATALOG_PATH) -> "ProblemCatalog":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.problems)
+
+    def problem(self, problem_id: int) -> Dict[str, str]:
+        """Problem in the {'title', 'difficulty', 'url'} shape used by suggestions"""
+        slug, title, difficulty, _ = self.problems[problem_id]
+        return {
+            'title': title,
+            'difficulty': self.difficulties[difficulty],
+            'url': PROBLEM_URL.format(slug=slug),
+        }
+
+    def problem_ids(self, names: Iterable[str]) -> Set[int]:
+        """Catalog ids for solved problems given as slugs, titles or URLs"""
+        ids = set()
+        for name in names:
+            problem_id = self.slug_index.get(slugify(name))
+            if problem_id is not None:
+                ids.add(problem_id)
+        return ids
+
+    def topic_problems(self, topic: str, difficulty: Optional[str] = None) -> List[int]:
+        """Ranked problem ids for a topic, optionally limited to one difficulty"""
+        topic_id = self.topic_index.get(topic)
+        if topic_id is None:
+            return []
+        ranked = self.by_topic[topic_id]
+        if difficulty is None:
+            return ranked
+        # by_topic is ordered by difficulty first, so each level is one contiguous run
+        level = self.difficulties.index(difficulty)
+        start = bisect.bisect_left(ranked, level, key=lambda pid: self.problems[pid][2])
+        end = bisect.bisect_right(ranked, level, lo=start, key=lambda pid: self.problems[pid][2])
+        return ranked[start:end]
+
+    def suggest(self, topics: List[str], per_topic: int = 3, min_count: int = 5,
+                limit: int = 8, solved: Iterable[str] = (),
+                difficulty: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Best-ranked problems for each topic, without duplicates and without
+        problems the user already solved, topped up with featured problems
+        when fewer than min_count were found. With a difficulty, each topic's
+        problems of that difficulty come first and the rest of the topic fills
+        in. Each topic's walk stops after per_topic picks, so cost does not
+        grow with the catalog size.
+        """
+        skip = self.problem_ids(solved)
+        picked: List[int] = []
+        if difficulty not in self.difficulties:
+            difficulty = None
+
+        def take(candidates: List[int], count: int) -> int:
+            taken = 0
+            for problem_id in candidates:
+                if taken >= count or len(picked) >= limit:
+                    break
+                if problem_id not in skip:
+                    skip.add(problem_id)
+                    picked.append(problem_id)
+                    taken += 1
+            return taken
+
+        for topic in topics:
+            taken = take(self.topic_problems(topic, difficulty), per_topic) if difficulty else 0
+            take(self.topic_problems(topic), per_topic - taken)
+        if len(picked) < min_count:
+            take(self.featured, limit)
+        return [self.problem(problem_id) for problem_id in picked]
+
+
+_catalog: Optional[ProblemCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> ProblemCatalog:
+    """The process-wide catalog, loaded from disk on first use"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = ProblemCatalog.load()
+    return _catalog
+
+
+def build_catalog(records: List[Dict], featured: Iterable[str] = ()) -> Dict:
+    """
+    Build the compact catalog with its inverted indexes from problem
+    records. Within each index, problems are ranked easiest first, then
+    by descending popularity, then by source order.
+    """
+    topics: Dict[str, int] = {}
+    problems: List[list] = []
+    slugs: Dict[str, int] = {}
+    popularity: List[float] = []
+    for record in records:
+        slug = slugify(record.get("slug") or record.get("url") or record["title"])
+        topic_ids = [topics.setdefault(topic, len(topics)) for topic in record.get("topics", [])]
+        if slug in slugs:
+            # The same problem listed under several topics is stored once
+            existing = problems[slugs[slug]][3]
+            existing.extend(t for t in topic_ids if t not in existing)
+            continue
+        slugs[slug] = len(problems)
+        problems.append([slug, record["title"], DIFFICULTIES.index(record["difficulty"]), topic_ids])
+        popularity.append(float(record.get("popularity", 0)))
+
+    def rank(problem_id: int):
+        return (problems[problem_id][2], -popularity[problem_id], problem_id)
+
+    by_topic: List[List[int]] = [[] for _ in topics]
+    for problem_id, problem in enumerate(problems):
+        for topic_id in problem[3]:
+            by_topic[topic_id].append(problem_id)
+    for index in by_topic:
+        index.sort(key=rank)
+
+    return {
+        "version": CATALOG_VERSION,
+        "topics": list(topics),
+        "difficulties": DIFFICULTIES,
+        "problems": problems,
+        "by_topic": by_topic,
+        "featured": [slugs[slugify(name)] for name in featured if slugify(name) in slugs],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the compact problem catalog")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="build a catalog from problem records")
+    build.add_argument("source", help="JSON list of {title, slug|url, difficulty, topics, popularity}")
+    build.add_argument("-o", "--output", default=CATALOG_PATH)
+    build.add_argument("--featured", nargs="*", default=[],
+                       help="slugs or titles used when a user has too few topic suggestions")
+    args = parser.parse_args()
+
+    with open(args.source, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    catalog = build_catalog(records, args.featured)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"Catalog with {len(catalog['problems'])} problems and {len(catalog['topics'])} topics saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
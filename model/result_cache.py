@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional, only needed for a cache shared between workers
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+
+def payload_digest(payload: Any) -> str:
+    """Stable hash of an upstream payload, independent of key order"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    digest: str
+    value: Any
+    expires_at: float
+
+
+class ResultCache:
+    """
+    Bounded TTL/LRU cache for analysis results with single-flight coalescing.
+
+    Entries are keyed by username and remember the digest of the upstream
+    payload they were computed from, so an expired entry can be revalidated
+    without rerunning the analysis when the upstream data has not changed.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+        self.coalesced = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a fresh cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def revalidate(self, key: str, digest: str) -> Optional[Any]:
+        """Reuse a (possibly expired) value if it was computed from the same payload"""
+        entry = self._entries.get(key)
+        if entry is None or entry.digest != digest:
+            return None
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        self._entries.move_to_end(key)
+        self.revalidations += 1
+        return entry.value
+
+    def put(self, key: str, digest: str, value: Any) -> None:
+        """Store a value and evict least recently used entries over capacity"""
+        self._entries[key] = CacheEntry(digest, value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, or run compute once for all
+        concurrent callers that miss on the same key.
+
+        compute runs in its own task that every caller awaits through a
+        shield, so a caller being cancelled (a dropped client) neither
+        cancels the computation nor fails the others waiting on it.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        task = asyncio.ensure_future(compute())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark retrieved so a failure nobody waited on is not logged
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "revalidations": self.revalidations,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+class SharedResultStore:
+    """
+    Redis-backed second cache level shared by every worker process, so a
+    result computed by one uvicorn worker is warm for all of them.
+    Redis errors are logged and treated as misses.
+    """
+
+    def __init__(self, client, ttl_seconds: float, prefix: str = "leetcode:analysis:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, ttl_seconds: float) -> "SharedResultStore":
+        if redis_asyncio is None:
+            raise RuntimeError("The redis package is required for a shared analysis cache")
+        return cls(redis_asyncio.from_url(url), ttl_seconds)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            raw = await self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Shared cache read failed for {key}: {e}")
+            self.errors += 1
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        stored = json.loads(raw)
+        return CacheEntry(stored["digest"], stored["value"], time.monotonic() + self.ttl_seconds)
+
+    async def put(self, key: str, digest: str, value: Any) -> None:
+        payload = json.dumps({"digest": digest, "value": value}, ensure_ascii=False)
+        try:
+            await self.client.set(self.prefix + key, payload, px=int(self.ttl_seconds * 1000))
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {key}: {e}")
+            self.errors += 1
+
+    async def close(self) -> None:
+        close = getattr(self.client, "aclose", None) or self.client.close
+        await close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
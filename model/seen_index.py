@@ -0,0 +1,55 @@
+"""
+Persistent set of usernames whose detailed profiles have been collected.
+
+The index is an append-only text file with one username per line, loaded
+into a Python set on open, so membership checks are O(1) and additions
+cost one line-buffered append. A line cut short by a crash is dropped on
+the next open.
+
+    with SeenIndex("leetcode_users.seen") as seen:
+        if username not in seen:
+            ...
+            seen.add(username)
+"""
+import os
+from typing import Iterable, Set
+
+
+class SeenIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self._usernames: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                with open(path, 'r+b') as f:
+                    f.truncate(complete)
+            self._usernames.update(data[:complete].decode('utf-8').splitlines())
+            self._usernames.discard("")
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._usernames
+
+    def __len__(self) -> int:
+        return len(self._usernames)
+
+    def add(self, username: str) -> None:
+        if username not in self._usernames:
+            self._usernames.add(username)
+            self._file.write(username + "\n")
+
+    def update(self, usernames: Iterable[str]) -> None:
+        for username in usernames:
+            self.add(username)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "SeenIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
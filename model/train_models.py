@@ -0,0 +1,291 @@
+"""
+Train model2's models on collected user profiles and save a new artifact version.
+
+Input is a JSON list (or JSONL file) of raw profiles in the shape served by
+the 3003 scraper's /leetcode/{username} endpoint, or LeetCodeUserCollector
+output (model.py): its detailed JSON, JSONL or JSONL.gz files, or a UserStore
+directory. Collector profiles are converted by from_collector; they carry
+the global rank, solved count and accepted submissions but no skills,
+languages or streak, so those features are zero for them. Labels come from each
+user's global rank on fixed scales, so batch and incremental training
+(online_learning.py) learn the same targets: the performance score maps
+log(rank) linearly onto 100..0, and the level buckets the rank. Unranked
+users only contribute to clustering.
+
+Features are built once per input file and cached as memory-mapped .npy
+files; cross-validation folds and grid-search candidates then run on all
+cores through joblib, with every worker mapping the same cached arrays.
+
+    python train_models.py profiles.json
+    python train_models.py profiles.jsonl --n-estimators 200 --clusters 8
+    python train_models.py profiles.jsonl --search --cv-folds 5
+    python train_models.py leetcode_users_detailed.jsonl.gz
+    python train_models.py leetcode_users
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+from typing import Dict, List
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import accuracy_score, mean_squared_error
+from sklearn.model_selection import KFold, train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from features import FEATURE_SCHEMA_VERSION
+from jsonl_sink import read_jsonl
+from model2 import LeetCodeAnalyzer, ProcessedUserData, to_user_data
+from model_artifacts import ARTIFACT_ROOT, write_artifacts
+from user_store import UserStore, flatten_user
+
+logger = logging.getLogger(__name__)
+
+# parse_user_data uses this rank for users without one
+UNRANKED = 1000000
+# Rank that maps to a performance score of 0
+MAX_RANK = 5000000
+# Worst rank still counted in each level
+RANK_LEVELS = [(50000, "Advanced"), (500000, "Intermediate"), (MAX_RANK, "Beginner")]
+LEVELS = [level for _, level in RANK_LEVELS]
+# Problem count used for collector profiles, whose GraphQL query does not return it
+TOTAL_QUESTIONS = 3456
+# Candidates tried by --search, for both forests
+PARAM_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [None, 12, 20],
+    "min_samples_leaf": [1, 5],
+}
+
+
+def from_collector(row: Dict) -> Dict:
+    """Scraper-shaped raw profile from a flattened collector user (see user_store.flatten_user)"""
+    ranking = int(row["ranking"])
+    return {
+        "username": str(row["username"]),
+        "rank": str(ranking) if ranking > 0 else "N/A",
+        "totalQuestions": f"{max(int(row['solved_all']), 0)}/{TOTAL_QUESTIONS}",
+        "languages": [],
+        "skills": [],
+        "submissions": str(max(int(row["submissions_all"]), 0)),
+        "streak": "",
+    }
+
+
+def source_files(path: str) -> List[str]:
+    """Files holding the profiles at path: a UserStore's partitions, or the file itself"""
+    return UserStore(path).partitions() if os.path.isdir(path) else [path]
+
+
+def load_profiles(path: str) -> List[Dict]:
+    """Scraper-shaped raw profiles from a scraper or collector file, or a UserStore directory"""
+    if os.path.isdir(path):
+        return [
+            from_collector({column: values[i] for column, values in chunk.items()})
+            for chunk in UserStore(path).iter_chunks()
+            for i in range(len(chunk["username"]))
+        ]
+    if path.endswith(('.jsonl', '.jsonl.gz')):
+        profiles = list(read_jsonl(path))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            profiles = json.load(f)
+    return [profile if "totalQuestions" in profile else from_collector(flatten_user(profile))
+            for profile in profiles]
+
+
+def ranked_mask(users: List[ProcessedUserData]) -> np.ndarray:
+    return np.fromiter((user.rank_numeric != UNRANKED for user in users), dtype=bool, count=len(users))
+
+
+def process_profiles(analyzer: LeetCodeAnalyzer, profiles: List[Dict]) -> List[ProcessedUserData]:
+    """Parse raw profiles, skipping the ones parse_user_data rejects"""
+    processed = []
+    for profile in profiles:
+        try:
+            processed.append(analyzer.parse_user_data(to_user_data(profile)))
+        except ValueError:
+            logger.warning(f"Skipping unparseable profile {profile.get('username', '?')}")
+    return processed
+
+
+def rank_scores(ranks: np.ndarray) -> np.ndarray:
+    """Performance score 0-100 from global rank, rank 1 scoring 100"""
+    ranks = np.clip(np.asarray(ranks, dtype=np.float64), 1, MAX_RANK)
+    return 100.0 * (1.0 - np.log(ranks) / np.log(MAX_RANK))
+
+
+def rank_levels(ranks: np.ndarray) -> np.ndarray:
+    levels = np.full(len(ranks), RANK_LEVELS[-1][1], dtype=object)
+    for worst_rank, level in reversed(RANK_LEVELS[:-1]):
+        levels[np.asarray(ranks) <= worst_rank] = level
+    return levels
+
+
+def feature_cache(profiles_path: str, analyzer: LeetCodeAnalyzer, cache_dir: str):
+    """
+    Feature matrix and ranks for a profiles file, built once and stored as
+    .npy files keyed by the file contents and feature schema. Returned as
+    read-only memory maps, so joblib workers share the pages instead of
+    receiving pickled copies.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for path in source_files(profiles_path):
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    digest.update(json.dumps([FEATURE_SCHEMA_VERSION, analyzer.features.feature_names]).encode('utf-8'))
+    key = digest.hexdigest()
+    X_path = os.path.join(cache_dir, f"{key}-features.npy")
+    ranks_path = os.path.join(cache_dir, f"{key}-ranks.npy")
+
+    if os.path.exists(X_path) and os.path.exists(ranks_path):
+        print(f"🔍 Reusing cached features {X_path}")
+    else:
+        users = process_profiles(analyzer, load_profiles(profiles_path))
+        arrays = {
+            ranks_path: np.array([user.rank_numeric for user in users], dtype=np.int64),
+            X_path: analyzer.features.transform(users),
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+        for path, array in arrays.items():
+            # Write then rename, so an interrupted run never leaves a truncated cache entry
+            with open(path + ".tmp", 'wb') as f:
+                np.save(f, array)
+            os.replace(path + ".tmp", path)
+        print(f"✅ Cached features for {len(users)} users in {X_path}")
+    return np.load(X_path, mmap_mode='r'), np.load(ranks_path, mmap_mode='r')
+
+
+def param_grid(search: bool, n_estimators: int) -> List[Dict]:
+    if not search:
+        return [{"n_estimators": n_estimators}]
+    return [dict(zip(PARAM_GRID, values)) for values in itertools.product(*PARAM_GRID.values())]
+
+
+def fold_scores(params: Dict, train_rows: np.ndarray, test_rows: np.ndarray,
+                X: np.ndarray, ranks: np.ndarray, seed: int) -> Dict[str, float]:
+    """Fit both forests with one configuration on one split; runs in a joblib worker"""
+    X_train, X_test = X[train_rows], X[test_rows]
+    ranks_train, ranks_test = ranks[train_rows], ranks[test_rows]
+    level = RandomForestClassifier(random_state=seed, **params).fit(X_train, rank_levels(ranks_train))
+    score = RandomForestRegressor(random_state=seed, **params).fit(X_train, rank_scores(ranks_train))
+    return {
+        "level_accuracy": float(accuracy_score(rank_levels(ranks_test), level.predict(X_test))),
+        "score_rmse": float(np.sqrt(mean_squared_error(rank_scores(ranks_test), score.predict(X_test)))),
+    }
+
+
+def train(X: np.ndarray, ranks: np.ndarray, configs: List[Dict], n_clusters: int, cv_folds: int,
+          test_size: float, seed: int, n_jobs: int):
+    """
+    Score every configuration on every split in parallel, then fit the best
+    classifier and regressor configurations on all ranked users. With fewer
+    than two folds a single held-out split is used.
+    """
+    ranked_rows = np.flatnonzero(np.asarray(ranks) != UNRANKED)
+    if len(ranked_rows) < 10:
+        raise ValueError(f"Need at least 10 ranked users to train, got {len(ranked_rows)}")
+    if len(X) < n_clusters:
+        raise ValueError(f"Need at least {n_clusters} users for {n_clusters} clusters, got {len(X)}")
+
+    if cv_folds >= 2:
+        splits = [(ranked_rows[train], ranked_rows[test])
+                  for train, test in KFold(cv_folds, shuffle=True, random_state=seed).split(ranked_rows)]
+    else:
+        splits = [tuple(train_test_split(ranked_rows, test_size=test_size, random_state=seed))]
+
+    # One task per (configuration, split); X and ranks are memmaps, so workers map the same file
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(fold_scores)(params, train_rows, test_rows, X, ranks, seed)
+        for params in configs for train_rows, test_rows in splits
+    )
+    evaluations = []
+    for i, params in enumerate(configs):
+        folds = scores[i * len(splits):(i + 1) * len(splits)]
+        evaluations.append({
+            "params": params,
+            "level_accuracy": float(np.mean([fold["level_accuracy"] for fold in folds])),
+            "score_rmse": float(np.mean([fold["score_rmse"] for fold in folds])),
+        })
+    best_level = max(evaluations, key=lambda evaluation: evaluation["level_accuracy"])
+    best_score = min(evaluations, key=lambda evaluation: evaluation["score_rmse"])
+
+    X_ranked = X[ranked_rows]
+    ranks_ranked = np.asarray(ranks)[ranked_rows]
+    level = RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **best_level["params"])
+    level.fit(X_ranked, rank_levels(ranks_ranked))
+    score = RandomForestRegressor(random_state=seed, n_jobs=n_jobs, **best_score["params"])
+    score.fit(X_ranked, rank_scores(ranks_ranked))
+    # Single-row predictions are slower when dispatched to a worker pool
+    level.set_params(n_jobs=None)
+    score.set_params(n_jobs=None)
+    clusters = make_pipeline(StandardScaler(), KMeans(n_clusters=n_clusters, n_init=10, random_state=seed))
+    clusters.fit(X)
+
+    models = {"level": level, "score": score, "clusters": clusters}
+    metrics = {
+        "level_accuracy": best_level["level_accuracy"],
+        "score_rmse": best_score["score_rmse"],
+        "users": len(X),
+        "ranked_users": len(ranked_rows),
+        "splits": len(splits),
+    }
+    selection = {
+        "level": best_level["params"],
+        "score": best_score["params"],
+        "evaluations": evaluations,
+    }
+    return models, metrics, selection
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train model2's models on collected profiles")
+    parser.add_argument("profiles", help="scraper or collector profiles: JSON list, JSONL(.gz) or UserStore directory")
+    parser.add_argument("-o", "--output-dir", default=ARTIFACT_ROOT)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--search", action="store_true", help="grid-search forest hyperparameters")
+    parser.add_argument("--cv-folds", type=int, default=0, help="k-fold cross-validation instead of one held-out split")
+    parser.add_argument("--clusters", type=int, default=5)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel workers, -1 for all cores")
+    parser.add_argument("--feature-cache", default=os.path.join(ARTIFACT_ROOT, "feature_cache"))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    analyzer = LeetCodeAnalyzer()
+    X, ranks = feature_cache(args.profiles, analyzer, args.feature_cache)
+    configs = param_grid(args.search, args.n_estimators)
+    models, metrics, selection = train(
+        X, ranks, configs, args.clusters, args.cv_folds, args.test_size, args.seed, args.jobs
+    )
+    metadata = {
+        "source": args.profiles,
+        "params": {"level": selection["level"], "score": selection["score"],
+                   "clusters": args.clusters, "cv_folds": args.cv_folds, "test_size": args.test_size,
+                   "seed": args.seed},
+        "labels": {
+            "level": "level bucketed from the global rank",
+            "score": "performance score from log global rank, 0-100",
+            "max_rank": MAX_RANK,
+            "levels": {level: worst_rank for worst_rank, level in RANK_LEVELS},
+        },
+        "metrics": metrics,
+        "search": selection["evaluations"],
+    }
+    path = write_artifacts(models, metadata, analyzer.features.feature_names, args.output_dir)
+    print(f"✅ Trained on {metrics['users']} users ({metrics['ranked_users']} ranked), "
+          f"{len(configs)} configurations x {metrics['splits']} splits")
+    print(f"   Level accuracy: {metrics['level_accuracy']:.3f} with {selection['level']}")
+    print(f"   Score RMSE: {metrics['score_rmse']:.2f} with {selection['score']}")
+    print(f"   Artifacts saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
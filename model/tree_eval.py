@@ -0,0 +1,203 @@
+"""
+Flat-array evaluator for fitted random forests.
+
+compile_forest exports every tree of a RandomForest/ExtraTrees regressor or
+classifier into one set of node arrays (feature, threshold, children, value)
+and walks all trees of all rows together, one vectorized step per tree
+level. This skips sklearn's per-call validation and per-tree dispatch, which
+dominate the cost of predicting one row. It follows sklearn's arithmetic
+exactly: X is cast to float32 and compared against float64 thresholds,
+classifier leaves hold normalized class fractions, and per-tree outputs are
+accumulated in tree order before dividing by the number of trees.
+
+    python tree_eval.py            # equivalence check and timing on a synthetic forest
+    python tree_eval.py --artifact # same, against the latest trained model2 artifact
+"""
+import argparse
+import time
+from typing import Any, Optional
+
+import numpy as np
+
+
+class CompiledForest:
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int, n_features: int,
+                 classes: Optional[np.ndarray] = None):
+        self.feature = feature          # (nodes,) split feature, 0 for leaves
+        self.threshold = threshold      # (nodes,) float64 split threshold
+        self.children = children        # (nodes, 2) left/right child, leaves point at themselves
+        self.value = value              # (nodes,) regression value or (nodes, classes) class fractions
+        self.roots = roots              # (trees,) root node of each tree
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.classes_ = classes
+        # Walk tables indexed by 2 * node, so the next node is one take() at 2 * node + go_right
+        self._walk_feature = np.repeat(feature, 2)
+        self._walk_threshold = np.repeat(threshold, 2)
+        self._walk_children = (2 * children).ravel()
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def leaves(self, X) -> np.ndarray:
+        """Leaf node reached in every tree, shape (trees, rows)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, the forest expects {self.n_features}")
+        n = len(X)
+        flat = X.ravel()
+        # Every (tree, row) pair in one flat array of doubled node ids, rows varying fastest
+        nodes = np.repeat(2 * self.roots, n)
+        row_starts = np.tile(np.arange(0, n * self.n_features, self.n_features), self.n_trees)
+        for _ in range(self.max_depth):
+            columns = self._walk_feature.take(nodes)
+            if n > 1:
+                columns += row_starts
+            go_right = flat.take(columns) > self._walk_threshold.take(nodes)
+            nodes = self._walk_children.take(nodes + go_right)
+        return (nodes // 2).reshape(self.n_trees, n)
+
+    def _mean_value(self, X) -> np.ndarray:
+        # cumsum adds tree by tree like sklearn does; ndarray.sum would use
+        # pairwise summation and differ from sklearn in the last bits
+        total = np.cumsum(self.value.take(self.leaves(X), axis=0), axis=0)[-1]
+        total /= self.n_trees
+        return total
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.classes_ is None:
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._mean_value(X)
+
+    def predict(self, X) -> np.ndarray:
+        if self.classes_ is None:
+            return self._mean_value(X)
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def compile_forest(forest) -> CompiledForest:
+    """Export a fitted single-output sklearn forest into flat node arrays"""
+    if getattr(forest, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be compiled")
+    classifier = hasattr(forest, "classes_")
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+
+    feature, threshold, children, value = [], [], [], []
+    for tree, offset in zip(trees, offsets[:-1]):
+        leaf = tree.children_left == -1
+        own = np.arange(tree.node_count) + offset
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        children.append(np.stack([
+            np.where(leaf, own, tree.children_left + offset),
+            np.where(leaf, own, tree.children_right + offset),
+        ], axis=1))
+        if classifier:
+            fractions = tree.value[:, 0, :].copy()
+            normalizer = fractions.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            fractions /= normalizer[:, None]
+            value.append(fractions)
+        else:
+            value.append(tree.value[:, 0, 0])
+
+    return CompiledForest(
+        feature=np.concatenate(feature).astype(np.intp),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        children=np.concatenate(children).astype(np.intp),
+        value=np.concatenate(value).astype(np.float64),
+        roots=offsets[:-1].astype(np.intp),
+        max_depth=max(tree.max_depth for tree in trees),
+        n_features=forest.n_features_in_,
+        classes=forest.classes_ if classifier else None,
+    )
+
+
+def compile_model(model: Any) -> Any:
+    """A CompiledForest for sklearn random forests, anything else unchanged"""
+    from sklearn.ensemble import (
+        ExtraTreesClassifier,
+        ExtraTreesRegressor,
+        RandomForestClassifier,
+        RandomForestRegressor,
+    )
+
+    forests = (RandomForestClassifier, RandomForestRegressor, ExtraTreesClassifier, ExtraTreesRegressor)
+    if isinstance(model, forests) and getattr(model, "n_outputs_", 1) == 1:
+        return compile_forest(model)
+    return model
+
+
+def best_time(predict, X, repeat: int) -> float:
+    """Best wall time of one predict call in microseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time compiled forests against sklearn")
+    parser.add_argument("--artifact", action="store_true", help="use the latest trained model2 forests")
+    parser.add_argument("--rows", type=int, default=2000, help="rows checked for equivalence")
+    parser.add_argument("--single-rows", type=int, default=500,
+                        help="rows also checked one at a time and in small batches")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.artifact:
+        import pickle
+        from model2 import get_analyzer
+
+        artifacts = get_analyzer().models
+        if artifacts.metadata is None:
+            raise SystemExit("❌ No compatible trained artifact found")
+        forests = {}
+        for name in ("level", "score"):
+            with open(artifacts.path(name), 'rb') as f:
+                forests[name] = pickle.load(f)
+        n_features = forests["score"].n_features_in_
+    else:
+        from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+        n_features = 39
+        rng = np.random.default_rng(0)
+        X_train = rng.normal(size=(2000, n_features)).astype(np.float32)
+        y = X_train[:, :5].sum(axis=1) + rng.normal(scale=0.5, size=len(X_train))
+        forests = {
+            "classifier": RandomForestClassifier(n_estimators=100, random_state=42).fit(
+                X_train, np.digitize(y, [-1.0, 1.0])),
+            "regressor": RandomForestRegressor(n_estimators=100, random_state=42).fit(X_train, y),
+        }
+
+    X = np.random.default_rng(1).normal(size=(args.rows, n_features))
+    single = min(args.single_rows, args.rows)
+    # Serving predicts single rows, so check those and small batches, not only one large batch
+    chunks = [X] + [X[i:i + 1] for i in range(single)] + [X[i:i + 7] for i in range(0, single, 7)]
+    for name, forest in forests.items():
+        compiled = compile_forest(forest)
+        for chunk in chunks:
+            if not np.array_equal(compiled.predict(chunk), forest.predict(chunk)):
+                raise SystemExit(f"❌ {name}: compiled predictions differ from sklearn ({len(chunk)} rows)")
+            if compiled.classes_ is not None and not np.array_equal(
+                    compiled.predict_proba(chunk), forest.predict_proba(chunk)):
+                raise SystemExit(f"❌ {name}: compiled probabilities differ from sklearn ({len(chunk)} rows)")
+        one = X[:1]
+        small = X[:16]
+        print(f"{name}: {compiled.n_trees} trees, {len(compiled.feature)} nodes, depth {compiled.max_depth}")
+        print(f"   1 row   sklearn {best_time(forest.predict, one, args.repeat):9.1f} µs"
+              f"   compiled {best_time(compiled.predict, one, args.repeat):8.1f} µs")
+        print(f"   16 rows sklearn {best_time(forest.predict, small, args.repeat):9.1f} µs"
+              f"   compiled {best_time(compiled.predict, small, args.repeat):8.1f} µs")
+    print("✅ Compiled predictions match sklearn exactly")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Pooled, retrying client for the 3003 `/leetcode/{username}` upstream used by model2.
+
+One requests.Session with a sized HTTPAdapter is shared by every call, so
+connections are reused across users and threads. 5xx responses, timeouts
+and connection errors are retried with full-jitter exponential backoff;
+other failures are returned as None right away. fetch_many fetches a list
+of users concurrently on a thread pool under a configurable limit, which
+can be lowered per call but not raised above the connection pool size.
+
+    with UpstreamClient(concurrency=16) as client:
+        users = client.fetch_many(["alice", "bob"])
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from model2 import LeetCodeUserData, to_user_data
+
+logger = logging.getLogger(__name__)
+
+LEETCODE_API_URL = os.environ.get("LEETCODE_API_URL", "http://localhost:3003/leetcode/{username}")
+
+
+class UpstreamClient:
+    def __init__(self, url: str = LEETCODE_API_URL, timeout: float = 10.0, max_retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 8.0, concurrency: int = 10):
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.concurrency = concurrency
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self) -> "UpstreamClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _sleep_before_retry(self, attempt: int) -> None:
+        time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+    def fetch_raw(self, username: str) -> Optional[Dict]:
+        """The raw profile payload for a user, or None if it could not be fetched"""
+        url = self.url.format(username=username)
+        for attempt in range(self.max_retries + 1):
+            last_try = attempt == self.max_retries
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                if last_try:
+                    logger.warning(f"Giving up on {username} after {attempt + 1} attempts: {e}")
+                    return None
+                self._sleep_before_retry(attempt)
+                continue
+
+            if response.status_code >= 500 and not last_try:
+                self._sleep_before_retry(attempt)
+                continue
+            if response.status_code != 200:
+                logger.warning(f"Upstream returned {response.status_code} for {username}")
+                return None
+            try:
+                api_data = response.json()
+            except ValueError as e:
+                logger.warning(f"Invalid JSON from upstream for {username}: {e}")
+                return None
+            if not api_data.get("status"):
+                logger.warning(f"Upstream error for {username}: {api_data.get('message', 'Unknown error')}")
+                return None
+            try:
+                return api_data["data"]["data"]
+            except (KeyError, TypeError) as e:
+                logger.warning(f"Missing expected field in upstream response for {username}: {e}")
+                return None
+        return None
+
+    def fetch_user(self, username: str) -> Optional[LeetCodeUserData]:
+        raw = self.fetch_raw(username)
+        return to_user_data(raw) if raw is not None else None
+
+    def iter_many(self, usernames: Iterable[str],
+                  concurrency: Optional[int] = None) -> Iterator[Tuple[str, Optional[LeetCodeUserData]]]:
+        """
+        Yield (username, data) pairs in input order while up to concurrency
+        requests run ahead. Only a bounded window of usernames is in flight,
+        so the input can be an arbitrarily long iterator. concurrency may not
+        exceed the client's own, which sizes the connection pool.
+        """
+        concurrency = concurrency or self.concurrency
+        if concurrency > self.concurrency:
+            raise ValueError(
+                f"concurrency {concurrency} exceeds the connection pool size {self.concurrency}; "
+                f"create the UpstreamClient with concurrency={concurrency}"
+            )
+        return self._iter_many(iter(usernames), concurrency)
+
+    def _iter_many(self, usernames: Iterator[str],
+                   concurrency: int) -> Iterator[Tuple[str, Optional[LeetCodeUserData]]]:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            window = deque()
+            for username in usernames:
+                window.append((username, pool.submit(self.fetch_user, username)))
+                if len(window) >= 2 * concurrency:
+                    name, future = window.popleft()
+                    yield name, future.result()
+            for name, future in window:
+                yield name, future.result()
+
+    def fetch_many(self, usernames: Iterable[str], concurrency: Optional[int] = None) -> List[Optional[LeetCodeUserData]]:
+        """Fetch users concurrently; results follow the input order, None for failures"""
+        return [data for _, data in self.iter_many(usernames, concurrency)]
+
+
+_client: Optional[UpstreamClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> UpstreamClient:
+    """The shared client used by model2.fetch_user_from_api"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = UpstreamClient()
+    return _client
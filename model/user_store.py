@@ -0,0 +1,201 @@
+"""
+Append-only columnar store for users gathered by LeetCodeUserCollector.
+
+A store is a directory of partitions, one per append, each an uncompressed
+.npz holding one typed array per column:
+
+    leetcode_users/
+        schema.json
+        part-000000.npz
+        part-000001.npz
+
+np.load reads .npz members on access, so column-projected reads only touch
+the requested columns, and iter_chunks yields one partition at a time for
+datasets that do not fit in memory. Missing numbers are stored as -1 and
+missing strings as "".
+
+    python user_store.py import leetcode_users_detailed.json --store leetcode_users
+    python user_store.py import leetcode_users_detailed.jsonl.gz --store leetcode_users
+    python user_store.py info --store leetcode_users
+"""
+import argparse
+import json
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from jsonl_sink import read_jsonl
+
+DIFFICULTIES = ("All", "Easy", "Medium", "Hard")
+MISSING = -1
+SCHEMA_VERSION = 1
+SCHEMA_FILE = "schema.json"
+PARTITION = re.compile(r'^part-(\d{6})\.npz$')
+
+COLUMNS: Dict[str, str] = {
+    "username": "str",
+    "real_name": "str",
+    "country": "str",
+    "ranking": "int64",
+    **{f"solved_{d.lower()}": "int32" for d in DIFFICULTIES},
+    **{f"submissions_{d.lower()}": "int32" for d in DIFFICULTIES},
+    "badge_count": "int32",
+}
+
+
+def _number(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return MISSING
+
+
+def flatten_user(user: Dict) -> Dict:
+    """One row from a global-ranking user or a detailed getUserProfile result"""
+    profile = user.get("profile") or {}
+    row = {
+        "username": user.get("username") or "",
+        "real_name": profile.get("realName") or "",
+        "country": profile.get("country") or "",
+        "ranking": _number(profile.get("ranking")),
+        "badge_count": len(user["badges"]) if user.get("badges") is not None else MISSING,
+    }
+    stats = {
+        item.get("difficulty"): item
+        for item in ((user.get("submitStats") or {}).get("acSubmissionNum") or [])
+    }
+    for difficulty in DIFFICULTIES:
+        item = stats.get(difficulty, {})
+        row[f"solved_{difficulty.lower()}"] = _number(item.get("count"))
+        row[f"submissions_{difficulty.lower()}"] = _number(item.get("submissions"))
+    return row
+
+
+class UserStore:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        schema_path = os.path.join(path, SCHEMA_FILE)
+        schema = {"version": SCHEMA_VERSION, "columns": COLUMNS}
+        if os.path.exists(schema_path):
+            with open(schema_path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+            if existing != schema:
+                raise ValueError(f"User store {path} has an incompatible schema")
+        else:
+            with open(schema_path, 'w', encoding='utf-8') as f:
+                json.dump(schema, f, indent=2)
+
+    def partitions(self) -> List[str]:
+        return sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path) if PARTITION.match(name)
+        )
+
+    def append(self, users: Iterable[Dict]) -> Optional[str]:
+        """Write raw collector users as a new partition; returns its path, or None if empty"""
+        rows = [flatten_user(user) for user in users]
+        if not rows:
+            return None
+        arrays = {}
+        for column, kind in COLUMNS.items():
+            if kind == "str":
+                arrays[column] = np.array([row[column] for row in rows], dtype=str)
+            else:
+                arrays[column] = np.fromiter((row[column] for row in rows), dtype=kind, count=len(rows))
+
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        try:
+            # os.link refuses to overwrite, so concurrent appenders never clobber a partition
+            number = len(self.partitions())
+            while True:
+                target = os.path.join(self.path, f"part-{number:06d}.npz")
+                try:
+                    os.link(tmp, target)
+                    return target
+                except FileExistsError:
+                    number += 1
+        finally:
+            os.unlink(tmp)
+
+    def iter_chunks(self, columns: Optional[List[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """One dict of column arrays per partition, reading only the requested columns"""
+        columns = list(columns or COLUMNS)
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            raise KeyError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        for partition in self.partitions():
+            with np.load(partition) as data:
+                yield {column: data[column] for column in columns}
+
+    def read(self, columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """All partitions concatenated into one array per column"""
+        columns = list(columns or COLUMNS)
+        chunks = list(self.iter_chunks(columns))
+        if not chunks:
+            return {
+                column: np.array([], dtype=str if COLUMNS[column] == "str" else COLUMNS[column])
+                for column in columns
+            }
+        return {column: np.concatenate([chunk[column] for chunk in chunks]) for column in columns}
+
+    def to_pandas(self, columns: Optional[List[str]] = None):
+        import pandas as pd
+
+        return pd.DataFrame(self.read(columns))
+
+    def iter_pandas(self, columns: Optional[List[str]] = None):
+        import pandas as pd
+
+        for chunk in self.iter_chunks(columns):
+            yield pd.DataFrame(chunk)
+
+    def __len__(self) -> int:
+        return sum(len(chunk["ranking"]) for chunk in self.iter_chunks(["ranking"]))
+
+
+def chunked(users: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for user in users:
+        chunk.append(user)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar store for collected LeetCode users")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    importer = subcommands.add_parser("import", help="append users from collector JSON files")
+    importer.add_argument("files", nargs="+")
+    importer.add_argument("--store", default="leetcode_users")
+    importer.add_argument("--chunk-size", type=int, default=50000, help="users per partition")
+    info = subcommands.add_parser("info", help="show partitions and row counts")
+    info.add_argument("--store", default="leetcode_users")
+    args = parser.parse_args()
+
+    store = UserStore(args.store)
+    if args.command == "import":
+        for path in args.files:
+            if path.endswith((".jsonl", ".jsonl.gz")):
+                users = read_jsonl(path)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    users = json.load(f)
+            imported = 0
+            for chunk in chunked(users, args.chunk_size):
+                store.append(chunk)
+                imported += len(chunk)
+            print(f"✅ Imported {imported} users from {path}")
+    partitions = store.partitions()
+    print(f"{args.store}: {len(store)} users in {len(partitions)} partitions")
+
+
+if __name__ == "__main__":
+    main()